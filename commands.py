@@ -0,0 +1,247 @@
+# CLI-команды приложения (flask <команда>).
+
+import re
+import time
+import click
+from flask import current_app
+from werkzeug.datastructures import MultiDict
+import sqlalchemy as sa
+from datetime import datetime, timezone, timedelta
+from sqlalchemy.orm import Session
+from extensions import db
+from models import Shop, CartItem, UserToken, IPAttemptLog
+from utils.search import create_search_index
+from utils.image_gc import collect_orphan_images
+from utils.assets import build_assets, brotli
+from utils.product_serializer import PRODUCT_FIELDS, parse_fields, product_select, serialize_rows, serialize_product
+from utils.product_filters import apply_product_filters
+from utils.pagination import keyset_order, keyset_column, keyset_condition
+from routes.product.routes_api import SORT_MAPPING
+
+
+# Строка плана SQLite без USING INDEX — полный просмотр таблицы
+FULL_SCAN_RE = re.compile(r'^SCAN (TABLE )?\w+$')
+
+
+def _listing(connection, params=(), sort='created_at_desc', after=None):
+    """
+    Запрос списка товаров так, как его строит get_all_products: product_select,
+    apply_product_filters (с полнотекстовым поиском) и keyset_order.
+    after — пара (значение сортировки, id) для страницы курсора.
+    """
+    fields, preview = parse_fields(MultiDict())
+    query, _, search_rank = apply_product_filters(product_select(fields, preview), MultiDict(params), connection)
+    if sort == 'relevance':
+        query = query.order_by(search_rank, Shop.id.desc())
+    else:
+        sort_column, sort_desc = SORT_MAPPING[sort]
+        query = query.order_by(*keyset_order(sort_column, Shop.id, sort_desc))
+        if after is not None:
+            query = query.filter(keyset_condition(keyset_column(sort_column), Shop.id, sort_desc, *after))
+    return query.limit(8)
+
+
+def _hot_queries(connection):
+    """
+    Частые запросы приложения, построенные теми же функциями, что и в маршрутах.
+    Возвращает список пар (название, select).
+    """
+    now = datetime.now(timezone.utc)
+    return [
+        ('get_all_products: по умолчанию', _listing(connection)),
+        ('get_all_products: category', _listing(connection, [('category', 'Мотоциклы'), ('category', 'Запчасти')])),
+        ('get_all_products: user_id', _listing(connection, [('user_id', '1')])),
+        ('get_all_products: sale', _listing(connection, [('sale', 'true')])),
+        ('get_all_products: price_asc', _listing(connection, [('price_min', '100'), ('price_max', '500')],
+                                                 sort='price_asc')),
+        ('get_all_products: title_asc', _listing(connection, sort='title_asc')),
+        ('get_all_products: cursor', _listing(connection, after=(datetime(2025, 1, 2), 1000))),
+        ('get_all_products: q, relevance', _listing(connection, [('q', 'товар 42')], sort='relevance')),
+        ('add_product: проверка артикула', sa.select(Shop).where(Shop.article_num == 'A-1').limit(1)),
+        ('cart_count', sa.select(sa.func.sum(CartItem.quantity))
+            .where(CartItem.user_id == 1, CartItem.is_purchased == False)),
+        ('_serialize_users: активная сессия', sa.select(UserToken).where(
+            UserToken.user_id == 1,
+            UserToken.revoked.is_(False),
+            UserToken.expires_at > now
+        ).order_by(UserToken.expires_at.asc()).limit(1)),
+        ('_serialize_users: ip_logs', sa.select(IPAttemptLog).where(IPAttemptLog.user_id == 1)),
+        ('check_if_token_revoked', sa.select(UserToken).where(UserToken.jti == 'jti').limit(1)),
+    ]
+
+
+def explain_hot_queries(rows):
+    """
+    Заполняет SQLite-базу в памяти и выполняет EXPLAIN QUERY PLAN для частых запросов.
+    Возвращает список (название, строки плана, строки с полным просмотром таблицы).
+    """
+    engine = sa.create_engine('sqlite://')
+    _seed_plan_db(engine, rows)
+
+    result = []
+    with engine.connect() as conn:
+        for name, stmt in _hot_queries(conn):
+            sql = str(stmt.compile(engine, compile_kwargs={'literal_binds': True}))
+            plan = [row[3] for row in conn.execute(sa.text(f'EXPLAIN QUERY PLAN {sql}'))]
+            result.append((name, plan, [line for line in plan if FULL_SCAN_RE.match(line)]))
+    engine.dispose()
+    return result
+
+
+def _seed_plan_db(engine, rows):
+    """Заполняет пустую SQLite-базу тестовыми данными и собирает статистику (ANALYZE)."""
+    db.metadata.create_all(engine)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    categories = ['Мотоциклы', 'Квадроциклы', 'Снегоходы', 'Мотоблоки', 'Бензо-инструмент', 'Запчасти']
+
+    with engine.begin() as conn:
+        conn.execute(sa.insert(Shop), [{
+            'article_num': f'A-{i}',
+            'user_id': i % 20 + 1,
+            'title': f'Товар {i}',
+            'description': 'Описание',
+            'price': i % 1000,
+            'quantity': i % 10,
+            'link_img': '/img/products/x.png',
+            'created_at': base + timedelta(minutes=i),
+            'category': categories[i % len(categories)],
+            'sale': i % 7 == 0,
+        } for i in range(rows)])
+        conn.execute(sa.insert(CartItem), [{
+            'user_id': i % 50 + 1,
+            'product_id': i % rows + 1,
+            'quantity': 1,
+            'is_purchased': i % 3 == 0,
+            'added_at': base,
+        } for i in range(rows)])
+        conn.execute(sa.insert(UserToken), [{
+            'jti': f'jti-{i}',
+            'user_id': i % 50 + 1,
+            'issued_at': base,
+            'expires_at': base + timedelta(hours=1),
+            'revoked': i % 2 == 0,
+        } for i in range(rows)])
+        conn.execute(sa.insert(IPAttemptLog), [{
+            'user_id': i % 50 + 1,
+            'ip_address': f'10.0.{i // 256}.{i % 256}',
+            'recovery_attempts_count': 3,
+            'is_blocked': False,
+        } for i in range(rows)])
+        # Поисковый индекс — как после миграции c4d82a7e5f19
+        create_search_index(conn)
+        conn.execute(sa.text('ANALYZE'))
+
+
+def _best_time(fn, repeat):
+    """Лучшее время из repeat запусков (в секундах)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def register_commands(app):
+    """Регистрирует CLI-команды в приложении."""
+
+    @app.cli.command('check-query-plans')
+    @click.option('--rows', default=5000, show_default=True, help='Количество строк в тестовых таблицах.')
+    def check_query_plans(rows):
+        """
+        Регрессионная проверка планов частых запросов.
+        Запускает EXPLAIN QUERY PLAN на заполненной SQLite-базе в памяти
+        и завершается с ошибкой, если какой-либо запрос читает таблицу целиком.
+        """
+        failed = []
+        for name, plan, full_scans in explain_hot_queries(rows):
+            status = 'FULL SCAN' if full_scans else 'ok'
+            click.echo(f"[{status}] {name}: {'; '.join(plan)}")
+            if full_scans:
+                failed.append(name)
+
+        if failed:
+            raise click.ClickException(f"Полный просмотр таблицы в запросах: {', '.join(failed)}")
+        click.echo('Все запросы используют индексы.')
+
+    @app.cli.command('reindex-search')
+    def reindex_search():
+        """Создаёт (при необходимости) и полностью перестраивает поисковый индекс товаров."""
+        with db.engine.begin() as conn:
+            create_search_index(conn)
+        click.echo('Поисковый индекс перестроен.')
+
+    @app.cli.command('bench-serializer')
+    @click.option('--sizes', default='100,10000', show_default=True, help='Размеры выборок через запятую.')
+    @click.option('--repeat', default=5, show_default=True, help='Количество повторов (берётся лучший).')
+    def bench_serializer(sizes, repeat):
+        """
+        Сравнивает стоимость сериализации товаров через ORM-объекты
+        и через Core select() по столбцам (product_select) на SQLite-базе в памяти.
+        """
+        try:
+            sizes = [int(n) for n in sizes.split(',') if n.strip()]
+        except ValueError:
+            raise click.BadParameter('Размеры должны быть целыми числами', param_hint='--sizes')
+        if not sizes or min(sizes) < 1:
+            raise click.BadParameter('Размеры должны быть больше нуля', param_hint='--sizes')
+
+        engine = sa.create_engine('sqlite://')
+        _seed_plan_db(engine, max(sizes))
+        fields = list(PRODUCT_FIELDS)
+        order = (Shop.created_at.desc(), Shop.id.desc())
+
+        for size in sizes:
+            def orm_path():
+                with Session(engine) as session:
+                    products = session.scalars(sa.select(Shop).order_by(*order).limit(size)).all()
+                    return [serialize_product(p, fields) for p in products]
+
+            def core_path():
+                with Session(engine) as session:
+                    rows = session.execute(product_select(fields).order_by(*order).limit(size)).all()
+                    return serialize_rows(rows, fields)
+
+            orm_time = _best_time(orm_path, repeat)
+            core_time = _best_time(core_path, repeat)
+            click.echo(
+                f"{size:>7} строк: ORM {orm_time / size * 1e6:8.2f} мкс/товар, "
+                f"Core {core_time / size * 1e6:8.2f} мкс/товар, "
+                f"ускорение x{orm_time / core_time:.1f}"
+            )
+
+    @app.cli.command('gc-images')
+    @click.option('--grace-hours', type=float, default=None,
+                  help='Не трогать файлы моложе N часов (по умолчанию IMAGE_GC_GRACE).')
+    @click.option('--batch-size', default=500, show_default=True, help='Файлов в одной проверке ссылок.')
+    @click.option('--dry-run', is_flag=True, help='Только показать, сколько места освободится.')
+    def gc_images(grace_hours, batch_size, dry_run):
+        """
+        Удаляет изображения товаров, на которые не ссылается ни один товар.
+        При нескольких воркерах запускается по расписанию (cron) вместо фонового потока.
+        """
+        grace = current_app.config.get('IMAGE_GC_GRACE', 24 * 3600) if grace_hours is None else grace_hours * 3600
+        report = collect_orphan_images(
+            current_app.static_folder,
+            current_app.config['UPLOAD_FOLDER'],
+            grace,
+            batch_size=batch_size,
+            dry_run=dry_run,
+        )
+        action = 'Будет удалено' if dry_run else 'Удалено'
+        click.echo(
+            f"Проверено файлов: {report['scanned']}. {action}: {report['files']} "
+            f"({report['bytes'] / (1024 * 1024):.2f} МБ)."
+        )
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """
+        Создаёт копии CSS/JS с хэшем содержимого в имени, их .gz/.br-варианты
+        и манифест для url_for. Запускается при выкладке, после изменения ресурсов.
+        """
+        manifest = build_assets(current_app.static_folder)
+        click.echo(f"Обработано файлов: {len(manifest)}.")
+        if brotli is None:
+            click.echo("Пакет brotli не установлен — созданы только .gz-копии.")
@@ -27,6 +27,12 @@ class Config:
     JWT_ACCESS_COOKIE_PATH = '/'
     JWT_REFRESH_COOKIE_PATH = '/token/refresh'
     JWT_ACCESS_TOKEN_EXPIRES = 3600    # 1 час
+    REVOCATION_CACHE_SIZE = 10000      # действующих токенов в кэше проверки отзыва
+    REVOCATION_CACHE_TTL = 60          # как долго токен считается неотозванным без запроса к БД, секунды
+    AUTH_VERSION_CACHE_TTL = 60        # как долго версия прав пользователя берётся из кэша, секунды
+
+    # === Блокировка IP-адресов ===
+    BLOCKED_IPS_TTL = 60               # как часто перечитывать заблокированные адреса из БД, секунды
 
     # === Время жизни токенов подтверждения и восстановления ===
     # Указывается в МИНУТАХ (удобно для теста: 1 минута, продакшен: 1440 = 24 часа)
@@ -41,6 +47,35 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'static', 'img', 'products')
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
+    IMMUTABLE_MAX_AGE = 365 * 24 * 3600    # срок кэширования файлов с хэшем в имени, секунды
+
+    # === Сжатие ответов (gzip, brotli при установленном пакете brotli) ===
+    COMPRESS_MIN_SIZE = 1024           # ответы меньше этого размера не сжимаются, байты
+    COMPRESS_LEVEL = 6                 # уровень сжатия (1–9; для brotli — quality)
+
+    # === Уменьшенные копии изображений товаров (нужен Pillow) ===
+    IMAGE_VARIANT_WIDTHS = (320, 640, 1024)   # ширины копий, px
+    IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')  # форматы копий
+    IMAGE_VARIANT_QUALITY = 80                # качество сжатия
+    IMAGE_WORKERS = 2                         # процессов в пуле обработки изображений
+
+    # === Сборка мусора в папке изображений ===
+    # Фоновая сборка запускается только встроенным сервером (python run.py) — это один процесс.
+    # При нескольких воркерах (gunicorn и т.п.) сборку запускают по расписанию, например cron:
+    #   0 4 * * * cd /srv/siteshop && flask gc-images
+    IMAGE_GC_INTERVAL = int(os.environ.get('IMAGE_GC_INTERVAL', 0))  # период фоновой сборки, секунды (0 — отключить)
+    IMAGE_GC_GRACE = 24 * 3600         # файлы моложе этого возраста не удаляются, секунды
+
+    # === Кэш каталога товаров ===
+    CATALOG_CACHE_SIZE = 256           # максимальное число закэшированных ответов
+    CATALOG_CACHE_TTL = 30             # время жизни ответа, секунды
+    COUNT_ESTIMATE_TTL = 300           # время жизни оценки количества товаров (count=estimate), секунды
+    PAGE_CACHE_SIZE = 512              # HTML-страниц гостей в кэше (главная и страницы товаров)
+    PAGE_CACHE_TTL = 300               # время жизни страницы в кэше, секунды
+    FACET_PRICE_BUCKET_SIZE = 10000    # ширина корзины гистограммы цен по умолчанию, руб.
+    EXPORT_BATCH_SIZE = 500            # строк за одно чтение при потоковой выгрузке
+    IMPORT_CHUNK_SIZE = 1000           # строк в одной порции записи при импорте
+    SUGGEST_INDEX_TTL = 300            # период фоновой перестройки индекса подсказок, секунды
 
     # === Почта ===
     MAIL_SERVER = 'smtp.mail.ru'
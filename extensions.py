@@ -11,11 +11,9 @@ jwt = JWTManager()
 mail = Mail()
 
 
-# Колбэк для проверки отзыва токена
+# Колбэк для проверки отзыва токена (с кэшем в памяти процесса, см. utils/token_revocation.py)
 
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(_, jwt_payload):
-    jti = jwt_payload["jti"]
-    from models import UserToken
-    token = UserToken.query.filter_by(jti=jti).first()
-    return token is not None and token.revoked
\ No newline at end of file
+    from utils.token_revocation import is_token_revoked
+    return is_token_revoked(jwt_payload)
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""добавить индексы для частых запросов
+
+Revision ID: 9b3e1f6a2c47
+Revises: 36c6b1178372
+Create Date: 2026-10-18 10:12:41.208517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e1f6a2c47'
+down_revision = '36c6b1178372'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.create_index('ix_shop_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_shop_category_created_at', ['category', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_shop_user_id_created_at', ['user_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_shop_price_id', ['price', 'id'], unique=False)
+        batch_op.create_index('ix_shop_title_id', ['title', 'id'], unique=False)
+        batch_op.create_index('ix_shop_article_num', ['article_num'], unique=False)
+        batch_op.create_index(
+            'ix_shop_sale_created_at', ['created_at', 'id'], unique=False,
+            postgresql_where=sa.text('sale = true'),
+            sqlite_where=sa.text('sale = 1')
+        )
+
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_index('ix_cart_items_user_purchased', ['user_id', 'is_purchased'], unique=False)
+
+    with op.batch_alter_table('user_tokens', schema=None) as batch_op:
+        batch_op.create_index('ix_user_tokens_user_revoked_expires', ['user_id', 'revoked', 'expires_at'], unique=False)
+
+    with op.batch_alter_table('ip_attempt_log', schema=None) as batch_op:
+        batch_op.create_index('ix_ip_attempt_log_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ip_attempt_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_ip_attempt_log_user_id')
+
+    with op.batch_alter_table('user_tokens', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_tokens_user_revoked_expires')
+
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_cart_items_user_purchased')
+
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.drop_index('ix_shop_sale_created_at')
+        batch_op.drop_index('ix_shop_article_num')
+        batch_op.drop_index('ix_shop_title_id')
+        batch_op.drop_index('ix_shop_price_id')
+        batch_op.drop_index('ix_shop_user_id_created_at')
+        batch_op.drop_index('ix_shop_category_created_at')
+        batch_op.drop_index('ix_shop_created_at_id')
@@ -0,0 +1,26 @@
+"""индекс по link_img в shop
+
+Revision ID: a7c2e94d1b38
+Revises: f3b6d0a81c52
+Create Date: 2026-10-18 16:40:12.552031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2e94d1b38'
+down_revision = 'f3b6d0a81c52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.create_index('ix_shop_link_img', ['link_img'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.drop_index('ix_shop_link_img')
@@ -0,0 +1,26 @@
+"""добавить auth_version в users
+
+Revision ID: b5e8d1f3a6c9
+Revises: a7c2e94d1b38
+Create Date: 2026-10-18 19:41:07.305512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8d1f3a6c9'
+down_revision = 'a7c2e94d1b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('auth_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('auth_version')
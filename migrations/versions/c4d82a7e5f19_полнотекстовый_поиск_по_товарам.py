@@ -0,0 +1,54 @@
+"""полнотекстовый поиск по товарам
+
+Revision ID: c4d82a7e5f19
+Revises: 9b3e1f6a2c47
+Create Date: 2026-10-18 11:03:27.514902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d82a7e5f19'
+down_revision = '9b3e1f6a2c47'
+branch_labels = None
+depends_on = None
+
+
+FIELDS = "title, description, category, article_num"
+TS_DOCUMENT = (
+    "to_tsvector('russian', coalesce(title, '') || ' ' || coalesce(description, '') || ' ' "
+    "|| coalesce(category, '') || ' ' || coalesce(article_num, ''))"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            f"CREATE VIRTUAL TABLE shop_fts USING fts5({FIELDS}, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(f"INSERT INTO shop_fts (rowid, {FIELDS}) SELECT id, {FIELDS} FROM shop")
+
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects import postgresql
+
+        with op.batch_alter_table('shop', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(f"UPDATE shop SET search_vector = {TS_DOCUMENT}")
+        op.create_index('ix_shop_search_vector', 'shop', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS shop_fts")
+
+    elif dialect == 'postgresql':
+        op.drop_index('ix_shop_search_vector', table_name='shop', postgresql_using='gin')
+        with op.batch_alter_table('shop', schema=None) as batch_op:
+            batch_op.drop_column('search_vector')
@@ -0,0 +1,34 @@
+"""добавить updated_at в shop
+
+Revision ID: e1a9c3b7d205
+Revises: c4d82a7e5f19
+Create Date: 2026-10-18 12:21:05.337190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a9c3b7d205'
+down_revision = 'c4d82a7e5f19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Для существующих товаров ревизией считается момент создания
+    op.execute("UPDATE shop SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP)")
+
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.alter_column('updated_at',
+               existing_type=sa.DateTime(timezone=True),
+               nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
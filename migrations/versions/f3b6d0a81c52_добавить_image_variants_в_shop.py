@@ -0,0 +1,26 @@
+"""добавить image_variants в shop
+
+Revision ID: f3b6d0a81c52
+Revises: e1a9c3b7d205
+Create Date: 2026-10-18 15:02:44.918204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b6d0a81c52'
+down_revision = 'e1a9c3b7d205'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('shop', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
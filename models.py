@@ -1,6 +1,12 @@
 from extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import func
+from datetime import datetime, timezone
+
+
+def utc_now():
+    """Текущее время UTC с микросекундами (для отметок об изменении записей)."""
+    return datetime.now(timezone.utc)
 
 
 class User(db.Model):
@@ -17,6 +23,9 @@ class User(db.Model):
     avatar_url = db.Column(db.String(255), default="/img/avatars/default_user.png")
     confirm_email = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    # Версия прав: передаётся в токене; увеличивается при смене роли,
+    # после чего ранее выданные токены отклоняются
+    auth_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def set_password(self, password):
         """Хэширует пароль и сохраняет его в hash_passwd"""
@@ -32,7 +41,10 @@ class User(db.Model):
 
 class IPAttemptLog(db.Model):
     __tablename__ = 'ip_attempt_log'
-    
+    __table_args__ = (
+        db.Index('ix_ip_attempt_log_user_id', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
         db.Integer,
@@ -54,6 +66,11 @@ class UserToken(db.Model):
     Используется для точного отзыва сессий и отображения статуса в админке. 
     """
     __tablename__ = 'user_tokens'
+    __table_args__ = (
+        # Активные сессии пользователя в админке (_serialize_users)
+        db.Index('ix_user_tokens_user_revoked_expires', 'user_id', 'revoked', 'expires_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, unique=True)
     user_id = db.Column(db.Integer, nullable=False)
@@ -64,6 +81,25 @@ class UserToken(db.Model):
 
 class Shop(db.Model):
     __tablename__ = 'shop'
+    __table_args__ = (
+        # Индексы под фильтры и сортировки каталога (get_all_products).
+        # Во все индексы сортировки добавлен id — он участвует в keyset-пагинации.
+        db.Index('ix_shop_created_at_id', 'created_at', 'id'),
+        db.Index('ix_shop_category_created_at', 'category', 'created_at', 'id'),
+        db.Index('ix_shop_user_id_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_shop_price_id', 'price', 'id'),
+        db.Index('ix_shop_title_id', 'title', 'id'),
+        db.Index('ix_shop_article_num', 'article_num'),
+        # Подсчёт ссылок на файл изображения (общие файлы с хэш-именами)
+        db.Index('ix_shop_link_img', 'link_img'),
+        # Частичный индекс: фильтр «Только акции» на витрине
+        db.Index(
+            'ix_shop_sale_created_at', 'created_at', 'id',
+            postgresql_where=db.text('sale = true'),
+            sqlite_where=db.text('sale = 1')
+        ),
+    )
+
 
     id = db.Column(db.Integer, primary_key=True)
     article_num = db.Column(db.String, nullable=False)
@@ -78,8 +114,12 @@ class Shop(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     link_img = db.Column(db.String(80), nullable=False)
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=func.now())
+    # Момент последнего изменения: ревизия товара для ETag и Last-Modified
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utc_now, onupdate=utc_now)
     category = db.Column(db.String(80))
     sale = db.Column(db.Boolean, default=False)
+    # Уменьшенные копии изображения: [{"width": 320, "format": "webp", "url": "/img/..."}, ...]
+    image_variants = db.Column(db.JSON)
 
     user = db.relationship('User', backref=db.backref('products', lazy=True, passive_deletes=True))
 
@@ -89,6 +129,11 @@ class Shop(db.Model):
 
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        # Текущая корзина пользователя (cart_count, checkout)
+        db.Index('ix_cart_items_user_purchased', 'user_id', 'is_purchased'),
+    )
+
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
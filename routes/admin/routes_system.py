@@ -5,6 +5,10 @@ from werkzeug.exceptions import NotFound
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, IPAttemptLog, UserToken
 from utils.cleanup import get_unconfirmed_cutoff
+from utils.user_sessions import get_token_user
+from utils.compression import compression_stats
+from utils.token_revocation import active_user_tokens, mark_revoked, set_auth_versions, USER_DELETED
+from utils.ip_blocklist import parse_block_entry, bump_blocklist_version
 from datetime import datetime, timezone
 
 
@@ -74,8 +78,7 @@ def search_users():
     Поиск пользователей в админке по ID, имени, email или дате регистрации.
     Поддерживает форматы даты: DD.MM.YYYY и YYYY-MM-DD. 
     """
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -128,8 +131,7 @@ def search_users():
 @jwt_required()
 def get_all_users():
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_token_user()
         if current_user.role != 'admin':
             return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -147,8 +149,7 @@ def update_user_role(user_id):
     """
     Изменяет роль пользователя (admin/suser/user). Доступен только администраторам. 
     """
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Только администратор может менять роли'}), 403
 
@@ -163,7 +164,10 @@ def update_user_role(user_id):
         return jsonify({'error': 'Пользователь не найден'}), 404
 
     user.role = new_role
+    # Токены с прежней ролью становятся недействительными
+    user.auth_version = (user.auth_version or 0) + 1
     db.session.commit()
+    set_auth_versions({user.id: user.auth_version})
 
     return jsonify({'success': True, 'role': user.role})
 
@@ -180,7 +184,7 @@ def delete_selected_users():
     Токены отзываются (revoked=True).
     """
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
 
     if not current_user or current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
@@ -199,6 +203,7 @@ def delete_selected_users():
         return jsonify({'error': 'Нельзя удалить самого себя'}), 400
 
     # Отзываем токены (логическая операция — не удаляем физически)
+    revoked_tokens = active_user_tokens(user_ids)
     UserToken.query.filter(UserToken.user_id.in_(user_ids)).update(
         {'revoked': True}, synchronize_session=False
     )
@@ -213,6 +218,8 @@ def delete_selected_users():
         sys_logger.error("Ошибка при удалении пользователей: %s", str(e), exc_info=True)
         return jsonify({'error': 'Ошибка при удалении'}), 500
 
+    mark_revoked(revoked_tokens)
+    set_auth_versions({user_id: USER_DELETED for user_id in user_ids})
     return jsonify({'success': True, 'deleted_count': deleted_count})
 
 
@@ -222,8 +229,7 @@ def delete_old_unconfirmed():
     """
     Массово удаляет неподтверждённые аккаунты, созданные более 24 часов назад (или другого срока из настроек).
     """
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -242,6 +248,7 @@ def delete_old_unconfirmed():
         IPAttemptLog.query.filter(IPAttemptLog.user_id.in_(user_ids)).delete(synchronize_session=False)
         User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
         db.session.commit()
+        set_auth_versions({user_id: USER_DELETED for user_id in user_ids})
 
     return jsonify({'success': True, 'deleted_count': len(user_ids)})
 
@@ -250,8 +257,7 @@ def delete_old_unconfirmed():
 @jwt_required()
 def revoke_user_sessions():
     """Отзыв всех сессий выбранных пользователей через UserToken."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -260,24 +266,27 @@ def revoke_user_sessions():
         return jsonify({'error': 'Не указаны user_ids'}), 400
 
     revoked_count = 0
+    revoked_tokens = []
     for uid in user_ids:
         try:
             user_id = int(uid)
             if User.query.get(user_id):
+                revoked_tokens.extend(active_user_tokens([user_id]))
                 UserToken.query.filter_by(user_id=user_id).update({'revoked': True})
                 revoked_count += 1
         except (ValueError, TypeError):
             continue
 
     db.session.commit()
+    # Отозванные токены отклоняются сразу, без ожидания истечения кэша
+    mark_revoked(revoked_tokens)
     return jsonify({'success': True, 'revoked_count': revoked_count})
 
 
 @admin_system_bp.route('/users/delete-tokens', methods=['DELETE'])
 @jwt_required()
 def delete_user_tokens():
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -347,8 +356,11 @@ def search_logs():
 @admin_system_bp.route('/logs/block', methods=['PATCH'])
 @jwt_required()
 def block_logs():
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    """
+    Блокирует IP-адреса. Кроме адресов из журнала можно указать подсеть
+    в нотации CIDR (например, 10.0.0.0/24) — для неё создаётся запись в журнале.
+    """
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -361,14 +373,33 @@ def block_logs():
     if not isinstance(ip_addresses, list):
         return jsonify({'error': 'Некорректный формат IP-адресов'}), 400
 
+    # Подсети приводим к каноническому виду (10.0.0.7/24 -> 10.0.0.0/24)
+    networks = set()
+    for i, value in enumerate(ip_addresses):
+        if isinstance(value, str) and '/' in value:
+            try:
+                ip_addresses[i] = parse_block_entry(value)
+            except ValueError:
+                return jsonify({'error': f'Некорректная подсеть: {value}'}), 400
+            networks.add(ip_addresses[i])
+
     try:
+        # Подсетей может не быть в журнале — создаём для них записи
+        existing = {ip for (ip,) in db.session.query(IPAttemptLog.ip_address)
+                    .filter(IPAttemptLog.ip_address.in_(networks))}
+        for network in networks - existing:
+            db.session.add(IPAttemptLog(ip_address=network, recovery_attempts_count=0, is_blocked=True))
+        created = len(networks - existing)
+
         # Находим все записи с такими IP и блокируем их
         updated = IPAttemptLog.query.filter(
-            IPAttemptLog.ip_address.in_(ip_addresses)
+            IPAttemptLog.ip_address.in_(ip_addresses),
+            IPAttemptLog.ip_address.not_in(networks - existing)
         ).update({'is_blocked': True}, synchronize_session=False)
 
         db.session.commit()
-        return jsonify({'blocked_count': updated}), 200
+        bump_blocklist_version()
+        return jsonify({'blocked_count': updated + created}), 200
 
     except Exception as e:
         db.session.rollback()
@@ -377,12 +408,43 @@ def block_logs():
 
 
 @admin_system_bp.route('/logs/unblock', methods=['PATCH'])
+@jwt_required()
 def unblock_logs():
-    ip_addresses = request.get_json().get('ip_addresses', [])
-    IPAttemptLog.query.filter(IPAttemptLog.ip_address.in_(ip_addresses)) \
-                      .update({'is_blocked': False})
-    db.session.commit()
-    return jsonify({'success': True})
+    """
+    Снимает блокировку с IP-адресов и подсетей. Подсеть приводится к тому же
+    каноническому виду, в котором её сохранила блокировка (10.0.0.7/24 -> 10.0.0.0/24).
+    """
+    current_user = get_token_user()
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Доступ запрещён'}), 403
+
+    data = request.get_json(silent=True) or {}
+    ip_addresses = data.get('ip_addresses', [])
+
+    if not ip_addresses:
+        return jsonify({'error': 'Не указаны IP-адреса'}), 400
+
+    if not isinstance(ip_addresses, list):
+        return jsonify({'error': 'Некорректный формат IP-адресов'}), 400
+
+    for i, value in enumerate(ip_addresses):
+        if isinstance(value, str) and '/' in value:
+            try:
+                ip_addresses[i] = parse_block_entry(value)
+            except ValueError:
+                return jsonify({'error': f'Некорректная подсеть: {value}'}), 400
+
+    try:
+        updated = IPAttemptLog.query.filter(IPAttemptLog.ip_address.in_(ip_addresses)) \
+                                    .update({'is_blocked': False}, synchronize_session=False)
+        db.session.commit()
+        bump_blocklist_version()
+        return jsonify({'success': True, 'unblocked_count': updated}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        sys_logger.error(f"Ошибка при разблокировке IP: {e}", exc_info=True)
+        return jsonify({'error': 'Ошибка при обновлении базы данных'}), 500
 
 
 # ФАЙЛОВЫЕ ЛОГИ
@@ -391,8 +453,7 @@ def unblock_logs():
 @jwt_required()
 def list_log_files():
     """Возвращает список .log файлов из папки LOG_DIR"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -412,8 +473,7 @@ def list_log_files():
 @jwt_required()
 def get_log_file_content(filename):
     """Возвращает содержимое указанного .log файла как plain text"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -450,8 +510,7 @@ def get_log_file_content(filename):
 @admin_system_bp.route('/logs/files/<filename>/clear', methods=['POST'])
 @jwt_required()
 def clear_log_file(filename):
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role != 'admin':
         return jsonify({'error': 'Доступ запрещён'}), 403
 
@@ -477,4 +536,16 @@ def clear_log_file(filename):
         return jsonify({'success': True, 'message': f'Файл {filename} очищен'})
     except Exception as e:
         sys_logger.error("Ошибка очистки лог-файла %s: %s", safe_filename, e)
-        abort(500)
\ No newline at end of file
+        abort(500)
+
+# СЖАТИЕ ОТВЕТОВ
+
+@admin_system_bp.route('/compression-stats')
+@jwt_required()
+def get_compression_stats():
+    """Возвращает экономию трафика от сжатия ответов по маршрутам (с момента запуска процесса)"""
+    current_user = get_token_user()
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Доступ запрещён'}), 403
+
+    return jsonify(compression_stats())
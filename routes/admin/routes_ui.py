@@ -1,8 +1,8 @@
 # Маршруты для пользователя с ролью admin.
 
 from flask import Blueprint, render_template
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import User
+from flask_jwt_extended import jwt_required
+from utils.user_sessions import get_token_user
 
 
 admin_bp = Blueprint('panel_a', __name__)
@@ -15,8 +15,7 @@ def admin_acaunt():
 @admin_bp.route('/panel')
 @jwt_required()
 def admin_panel():
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_token_user()
     if current_user.role not in 'admin':
         return "Доступ запрещён", 403
     return render_template('admin/admin_panel.html')
\ No newline at end of file
@@ -9,6 +9,7 @@ from utils.tokens import generate_password_reset_token, generate_email_confirmat
 from utils.mail import send_password_reset_email, send_confirm_email, normalize_email
 from utils.ip_log import get_client_ip, get_or_create_ip_log, decrement_recovery_attempts, bind_ip_to_user_and_reset_attempts, update_ip_log_with_user_agent
 from utils.user_sessions import create_access_token_for_user
+from utils.token_revocation import mark_revoked
 from utils.responses import render_or_json
 from datetime import datetime, timezone
 
@@ -230,7 +231,7 @@ def login():
 
         update_ip_log_with_user_agent(client_ip)
 
-        access_token = create_access_token_for_user(user.id)
+        access_token = create_access_token_for_user(user)
 
         db.session.commit()
 
@@ -284,6 +285,7 @@ def logout():
         if token:
             token.revoked = True
             db.session.commit()
+            mark_revoked([(jti, get_jwt()["exp"])])
     except Exception:
         pass
 
@@ -1,6 +1,9 @@
-from flask import Blueprint, render_template, make_response
-from utils.user_sessions import get_safe_user_id
-from models import User, Shop
+from flask import Blueprint, render_template
+from utils.user_sessions import get_safe_user_id, get_current_user
+from utils.page_cache import guest_page, product_page_key
+from utils.catalog_cache import get_catalog_version
+from utils.catalog_initial import initial_catalog_payload
+from models import Shop
 
 
 main_bp = Blueprint('main', __name__)
@@ -11,19 +14,21 @@ main_bp = Blueprint('main', __name__)
 def index():
     user_id = get_safe_user_id()
 
+    # Гость — страница из кэша (одинакова для всех гостей). Страница содержит
+    # первую страницу каталога, поэтому ключ включает версию каталога
     if user_id is None:
-        response = make_response(render_template('index.html', username="Гость", role=None))
-        response.set_cookie('access_token', '', expires=0)
-        return response
+        return guest_page(('index', get_catalog_version()), lambda: render_template(
+            'index.html', username="Гость", role=None, catalog_initial=initial_catalog_payload()
+        ))
 
     # Пользователь авторизован
-    user = User.query.get(int(user_id))
+    user = get_current_user()
     context = {
         "username": user.username if user else "Гость",
         "role": user.role if user else None
     }
 
-    return render_template('index.html', **context)
+    return render_template('index.html', catalog_initial=initial_catalog_payload(), **context)
 
 
 @main_bp.route('/product/<int:product_id>')
@@ -31,23 +36,30 @@ def product_page(product_id):
     """
     Страница товара. Безопасно обрабатывает JWT-токен:
     - если токен валиден — показывает данные пользователя,
-    - если токен недействителен или отсутствует — очищает куку и показывает как гостя.
+    - если токен недействителен или отсутствует — очищает куку и показывает как гостя
+      (страница гостя берётся из кэша без запроса к БД).
     """
-    product = Shop.query.get(product_id)
-    if not product:
-        return render_template('404.html'), 404
-
     # Получаем user_id или None (если токен недействителен/отсутствует)
     user_id = get_safe_user_id()
 
-    # Если нет валидной сессии — всегда очищаем куку и показываем как гостя
     if user_id is None:
-        response = make_response(render_template('view_product.html', product=product, username=None, role=None))
-        response.set_cookie('access_token', '', expires=0)
+        def render():
+            product = Shop.query.get(product_id)
+            if not product:
+                return None
+            return render_template('view_product.html', product=product, username=None, role=None)
+
+        response = guest_page(product_page_key(product_id), render)
+        if response is None:
+            return render_template('404.html'), 404
         return response
 
+    product = Shop.query.get(product_id)
+    if not product:
+        return render_template('404.html'), 404
+
     # Пользователь авторизован — подгружаем его данные
-    user = User.query.get(int(user_id))
+    user = get_current_user()
     context = {
         "username": user.username if user else None,
         "role": user.role if user else None
@@ -1,15 +1,61 @@
+import csv
 import logging
-import os
+import math
 from flask import Blueprint, request, jsonify, current_app
-from models import User, Shop, db
-from utils.add_img import save_product_image
+from werkzeug.datastructures import MultiDict
+from models import Shop, CartItem, db, utc_now
+from sqlalchemy.exc import IntegrityError
+from utils.add_img import save_product_image, delete_image_files, referenced_images
+from utils.background import run_in_background
+from utils.image_variants import schedule_image_variants
+from utils.search import unindex_products
+from utils.suggest import suggest_index
+from utils.page_cache import evict_product_pages
+from utils.product_filters import apply_product_filters, PRODUCT_FILTER_PARAMS
+from utils.product_facets import compute_facets
+from utils.product_export import stream_products, EXPORT_FORMATS
+from utils.product_import import ProductImporter, iter_records, IMPORT_FORMATS
+from utils.catalog_cache import cached_catalog_response, bump_catalog_version, normalize_args
+from utils.http_cache import catalog_etag, make_etag, is_not_modified, not_modified_response, set_validators
+from utils.product_serializer import parse_fields, product_select, serialize_rows, serialize_product
+from utils.pagination import (
+    encode_cursor, decode_cursor, keyset_order, keyset_column, keyset_condition,
+    count_rows, estimate_rows, parse_count_mode
+)
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
-from pathlib import Path
+from utils.user_sessions import get_token_user
 
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Максимальное количество ID в одном запросе /products/batch
+BATCH_MAX_IDS = 100
+
+# Сортировки списка товаров: имя -> (столбец, по убыванию)
+SORT_MAPPING = {
+    'title_asc': (Shop.title, False),
+    'title_desc': (Shop.title, True),
+    'article_num_asc': (Shop.article_num, False),
+    'article_num_desc': (Shop.article_num, True),
+    'price_asc': (Shop.price, False),
+    'price_desc': (Shop.price, True),
+    'quantity_asc': (Shop.quantity, False),
+    'quantity_desc': (Shop.quantity, True),
+    'created_at_asc': (Shop.created_at, False),
+    'created_at_desc': (Shop.created_at, True),
+}
+
+# Параметры списка товаров, не влияющие на набор строк (не входят в ключ оценки количества)
+LISTING_ARGS = {'page', 'per_page', 'cursor', 'sort', 'fields', 'description_preview', 'count', 'format', 'all'}
+
+
+def _count_products(query, count_mode, args):
+    """Общее количество товаров запроса: точное (exact) или оценка (estimate)."""
+    if count_mode == 'exact':
+        return count_rows(query)
+    filters = MultiDict([(k, v) for k, v in args.items(multi=True) if k not in LISTING_ARGS])
+    return estimate_rows(query, ('products', normalize_args(filters)))
+
 
 
 @api_bp.route('/products/<int:id>', methods=['GET'])
@@ -18,204 +64,256 @@ def get_product_by_id(id):
     Получить данные одного товара по ID.
     Доступен всем, включая гостей.
     """
-    product = Shop.query.get(id)
-    if not product:
+    try:
+        fields, preview = parse_fields(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # updated_at нужен для ETag, даже если не попадает в ответ
+    row = db.session.execute(
+        product_select(fields, preview)
+        .add_columns(Shop.updated_at.label('_updated_at'))
+        .where(Shop.id == id)
+    ).first()
+    if not row:
         return jsonify({"error": "Товар не найден"}), 404
 
-    return jsonify({
-        "id": product.id,
-        "article_num": product.article_num,
-        "user_id": product.user_id,
-        "title": product.title,
-        "description": product.description,
-        "price": product.price,
-        "quantity": product.quantity,
-        "img_url": product.link_img,
-        "created_at": product.created_at.isoformat(),
-        "sale": product.sale,
-        "category": product.category
-    }), 200
+    # Ревизия товара — момент его последнего изменения
+    updated_at = row._mapping['_updated_at']
+    etag = make_etag(id, updated_at, normalize_args(request.args))
+    if is_not_modified(etag, updated_at):
+        return not_modified_response(etag, updated_at)
+
+    response = jsonify(serialize_rows([row], fields)[0])
+    return set_validators(response, etag, updated_at)
+
+@api_bp.route('/products/batch', methods=['GET'])
+def get_products_batch():
+    """
+    Получить несколько товаров по списку ID одним запросом: ?ids=1,2,3.
+    Товары возвращаются в порядке запроса, отсутствующие ID — в not_found.
+    Поддерживает fields и description_preview, как и запрос одного товара.
+    """
+    raw_ids = request.args.get('ids', '')
+    try:
+        ids = list(dict.fromkeys(int(i) for i in raw_ids.split(',') if i.strip()))
+    except ValueError:
+        return jsonify({"error": "Некорректный формат ID"}), 400
+    if not ids:
+        return jsonify({"error": "Не указаны ID товаров"}), 400
+    if len(ids) > BATCH_MAX_IDS:
+        return jsonify({"error": f"Можно запросить не более {BATCH_MAX_IDS} товаров"}), 400
+
+    try:
+        fields, preview = parse_fields(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = db.session.execute(
+        product_select(fields, preview)
+        .add_columns(Shop.updated_at.label('_updated_at'))
+        .where(Shop.id.in_(ids))
+    ).all()
+    found = {row.id: row for row in rows}
+    ordered = [found[i] for i in ids if i in found]
+    not_found = [i for i in ids if i not in found]
+
+    # Ревизия набора — ревизии всех найденных товаров. Last-Modified не выдаётся:
+    # удаление товара из набора не сдвигает дату последнего изменения
+    revisions = [(row.id, row._mapping['_updated_at']) for row in ordered]
+    etag = make_etag(revisions, normalize_args(request.args))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    response = jsonify({"items": serialize_rows(ordered, fields), "not_found": not_found})
+    return set_validators(response, etag)
+
 
 @api_bp.route('/products', methods=['GET'])
+@catalog_etag
+@cached_catalog_response
 def get_all_products():
     """Получить список товаров с фильтрами, сортировкой и пагинацией"""
     
     args = request.args
-    query = Shop.query
-
-    # === Фильтр по владельцу (user_id) ===
-    user_id_param = args.get('user_id', type=int)
-    if user_id_param is not None:
-        # Фильтруем только товары указанного пользователя
-        query = query.filter(Shop.user_id == user_id_param)
-
-    # === Фильтр по категории ===
-    categories = args.getlist('category')
-    if categories:
-        # Очистка: удаляем пустые и лишние пробелы
-        clean_categories = [c.strip() for c in categories if c.strip()]
-        if clean_categories:
-            query = query.filter(Shop.category.in_(clean_categories))
-
-    # === Фильтр по названию ===
-    title = args.get('title')
-    if title:
-        query = query.filter(Shop.title.ilike(f"%{title}%"))
-
-    # === Фильтр по цене ===
-    price_min = args.get('price_min', type=float)
-    price_max = args.get('price_max', type=float)
-    if price_min is not None and price_max is not None:
-        if price_min > price_max:
-            return jsonify({"error": "price_min не может быть больше price_max"}), 400
-        query = query.filter(Shop.price.between(price_min, price_max))
-    elif price_min is not None:
-        if price_min < 0:
-            return jsonify({"error": "price_min не может быть отрицательным"}), 400
-        query = query.filter(Shop.price >= price_min)
-    elif price_max is not None:
-        if price_max < 0:
-            return jsonify({"error": "price_max не может быть отрицательным"}), 400
-        query = query.filter(Shop.price <= price_max)
-
-    # === Фильтр по количеству ===
-    quantity = args.get('quantity', type=int)
-    quantity_min = args.get('quantity_min', type=int)
-    quantity_max = args.get('quantity_max', type=int)
-    
-    if quantity is not None:
-        if quantity < 0:
-            return jsonify({"error": "Количество не может быть отрицательным"}), 400
-        query = query.filter(Shop.quantity == quantity)
-    else:
-        if quantity_min is not None:
-            if quantity_min < 0:
-                return jsonify({"error": "quantity_min не может быть отрицательным"}), 400
-            query = query.filter(Shop.quantity >= quantity_min)
-        if quantity_max is not None:
-            if quantity_max < 0:
-                return jsonify({"error": "quantity_max не может быть отрицательным"}), 400
-            query = query.filter(Shop.quantity <= quantity_max)
-
-    # === Фильтр по дате создания ===
-    date_exact = args.get('date')
-    date_from = args.get('date_from')
-    date_to = args.get('date_to')
-
-    if date_exact:
-        try:
-            dt = datetime.strptime(date_exact, "%d.%m.%Y")
-            query = query.filter(db.func.date(Shop.created_at) == dt.date())
-        except ValueError:
-            return jsonify({"error": "Неверный формат даты. Используйте дд.мм.гггг"}), 400
-    else:
-        if date_from:
-            try:
-                dt_from = datetime.strptime(date_from, "%d.%m.%Y")
-                query = query.filter(Shop.created_at >= dt_from)
-            except ValueError:
-                return jsonify({"error": "Неверный формат date_from. Используйте дд.мм.гггг"}), 400
-        if date_to:
-            try:
-                dt_to = datetime.strptime(date_to, "%d.%m.%Y") + timedelta(days=1)
-                query = query.filter(Shop.created_at < dt_to)
-            except ValueError:
-                return jsonify({"error": "Неверный формат date_to. Используйте дд.мм.гггг"}), 400
-
-    # === Фильтр по акции ===
-    sale = args.get('sale')
-    if sale is not None:
-        sale_lower = sale.lower()
-        if sale_lower in ('true', '1', 'on', 'yes'):
-            query = query.filter(Shop.sale == True)
-        elif sale_lower in ('false', '0', 'off', 'no'):
-            query = query.filter(Shop.sale == False)
-        else:
-            return jsonify({"error": "Параметр sale должен быть булевым (true/false, 1/0)"}), 400
+
+    # === Выборочные поля ответа ===
+    try:
+        fields, preview = parse_fields(args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Core-запрос только по нужным столбцам — без создания ORM-объектов
+    query = product_select(fields, preview)
+
+    # === Фильтры ===
+    try:
+        query, search_text, search_rank = apply_product_filters(query, args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 
     # === Сортировка ===
     sort_param = args.get('sort')
-    sort_mapping = {
-        'title_asc': Shop.title.asc(),
-        'title_desc': Shop.title.desc(),
-        'article_num_asc': Shop.article_num.asc(),
-        'article_num_desc': Shop.article_num.desc(),
-        'price_asc': Shop.price.asc(),
-        'price_desc': Shop.price.desc(),
-        'quantity_asc': Shop.quantity.asc(),
-        'quantity_desc': Shop.quantity.desc(),
-        'created_at_asc': Shop.created_at.asc(),
-        'created_at_desc': Shop.created_at.desc(),
-    }
-
-    if sort_param:
-        if sort_param not in sort_mapping:
-            return jsonify({"error": f"Недопустимое значение сортировки: {sort_param}"}), 400
-        query = query.order_by(sort_mapping[sort_param])
+    sort_mapping = SORT_MAPPING
+
+    if sort_param == 'relevance':
+        # Сортировка по релевантности имеет смысл только вместе с поиском
+        if not search_text:
+            return jsonify({"error": "Сортировка relevance требует параметр q"}), 400
+        if args.get('cursor') is not None:
+            return jsonify({"error": "Сортировка relevance не поддерживает курсорную пагинацию"}), 400
+        if search_rank is not None:
+            query = query.order_by(search_rank, Shop.id.desc())
+        else:
+            query = query.order_by(*keyset_order(Shop.created_at, Shop.id, True))
     else:
-        # Сортировка по умолчанию: новые товары сверху
-        query = query.order_by(Shop.created_at.desc())
+        if sort_param:
+            if sort_param not in sort_mapping:
+                return jsonify({"error": f"Недопустимое значение сортировки: {sort_param}"}), 400
+        else:
+            # Сортировка по умолчанию: новые товары сверху
+            sort_param = 'created_at_desc'
+
+        sort_column, sort_desc = sort_mapping[sort_param]
+        query = query.order_by(*keyset_order(sort_column, Shop.id, sort_desc))
+
+    # === Потоковая выгрузка всех товаров (format=ndjson|csv) ===
+    export_format = args.get('format')
+    if export_format and export_format != 'json':
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"Недопустимый формат: {export_format}"}), 400
+        return stream_products(query, fields, export_format)
 
     # === Пагинация или все товары ===
     if args.get('all') is not None:
-        products = query.all()
+        products = db.session.execute(query).all()
         result = {
-            "items": [{
-                "id": p.id,
-                "article_num": p.article_num,
-                "user_id": p.user_id,
-                "title": p.title,
-                "description": p.description,
-                "price": p.price,
-                "quantity": p.quantity,
-                "img_url": p.link_img,
-                "created_at": p.created_at.isoformat(),
-                "sale": p.sale,
-                "category": p.category
-            } for p in products],
+            "items": serialize_rows(products, fields),
             "total": len(products),
             "all": True
         }
         return jsonify(result)
 
-    # Пагинация по умолчанию
-    page = args.get('page', 1, type=int)
     per_page = args.get('per_page', 8, type=int)
-
     if per_page > 100:
         per_page = 100
+    if per_page < 1:
+        per_page = 8
+
+    # === Подсчёт общего количества ===
+    # exact — точный COUNT, estimate — оценка (статистика планировщика или кэш),
+    # none — без подсчёта, клиенту возвращается только has_next.
+    # По умолчанию: exact для постраничного режима, none для курсорного.
+    cursor = args.get('cursor')
+    try:
+        count_mode = parse_count_mode(args.get('count'), 'none' if cursor is not None else 'exact')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # === Курсорная пагинация ===
+    # Включается параметром cursor (пустое значение — первая страница).
+    # Стоимость страницы не зависит от глубины прокрутки, а вставка новых
+    # товаров не приводит к дублям и пропускам между страницами.
+    if cursor is not None:
+        # Значение столбца сортировки нужно для следующего курсора
+        cursor_column = keyset_column(sort_column)
+        page_query = query.add_columns(cursor_column.label('_sort'))
+        if cursor:
+            try:
+                last_value, last_id = decode_cursor(cursor, sort_param)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            page_query = page_query.filter(
+                keyset_condition(cursor_column, Shop.id, sort_desc, last_value, last_id)
+            )
+
+        # Берём на одну запись больше, чтобы узнать, есть ли следующая страница
+        rows = db.session.execute(page_query.limit(per_page + 1)).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+
+        next_cursor = None
+        if has_next:
+            last = rows[-1]
+            next_cursor = encode_cursor(sort_param, last._mapping['_sort'], last.id)
+
+        result = {
+            "items": serialize_rows(rows, fields),
+            "next_cursor": next_cursor,
+            "per_page": per_page
+        }
+
+        # Общее количество считается только по явному запросу
+        if count_mode != 'none':
+            result["total_items"] = _count_products(query, count_mode, args)
+            result["count"] = count_mode
+
+        return jsonify(result)
+
+    # Пагинация по умолчанию
+    page = args.get('page', 1, type=int)
     if page < 1:
         page = 1
 
     try:
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Берём на одну запись больше: has_next известен без подсчёта
+        rows = db.session.execute(query.limit(per_page + 1).offset((page - 1) * per_page)).all()
+        total_items = _count_products(query, count_mode, args) if count_mode != 'none' else None
     except Exception as e:
         logging.error(f"Ошибка пагинации: {e}")
         return jsonify({"error": "Ошибка при получении товаров"}), 500
 
+    has_next = len(rows) > per_page
     result = {
-        "items": [{
-            "id": p.id,
-            "article_num": p.article_num,
-            "user_id": p.user_id,
-            "title": p.title,
-            "description": p.description,
-            "price": p.price,
-            "quantity": p.quantity,
-            "img_url": p.link_img,
-            "created_at": p.created_at.isoformat(),
-            "sale": p.sale,
-            "category": p.category
-        } for p in paginated.items],
-        "total_pages": paginated.pages,
-        "current_page": paginated.page,
-        "per_page": paginated.per_page,
-        "total_items": paginated.total
+        "items": serialize_rows(rows[:per_page], fields),
+        "current_page": page,
+        "per_page": per_page,
+        "has_next": has_next,
+        "count": count_mode
     }
+    if total_items is not None:
+        result["total_items"] = total_items
+        result["total_pages"] = math.ceil(total_items / per_page)
 
     return jsonify(result)
 
 
+@api_bp.route('/products/suggest', methods=['GET'])
+def suggest_products():
+    """
+    Подсказки при вводе: товары, у которых название, слово названия
+    или артикул начинается с prefix. Отвечает из индекса в памяти, без запроса к БД.
+    """
+    prefix = request.args.get('prefix', '').strip()
+    if not prefix:
+        return jsonify({"error": "Не указан prefix"}), 400
+
+    limit = request.args.get('limit', 10, type=int)
+    if limit < 1 or limit > 50:
+        limit = 10
+
+    suggest_index.ensure_fresh()
+    return jsonify({"items": suggest_index.search(prefix, limit)})
+
+
+@api_bp.route('/products/facets', methods=['GET'])
+@catalog_etag
+@cached_catalog_response
+def get_product_facets():
+    """
+    Фасеты для фильтров витрины: количество товаров по категориям,
+    по признаку акции и гистограмма цен (bucket_size или price_edges).
+    Принимает те же параметры фильтрации, что и GET /api/products.
+    """
+    try:
+        facets = compute_facets(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(facets)
+
+
 @api_bp.route('/products', methods=['POST'])
 @jwt_required()
 def add_product():
@@ -224,8 +322,7 @@ def add_product():
     Ожидает multipart/form-data с полями:
     name, description, price, quantity, article-number, category, sale (опционально), image
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_token_user()
     if not user:
         return jsonify({"error": "Пользователь не найден"}), 404
 
@@ -304,6 +401,8 @@ def add_product():
         )
         db.session.add(new_product)
         db.session.commit()
+        bump_catalog_version()
+        schedule_image_variants(new_product.id, new_product.link_img)
 
         return jsonify({
             "success": True,
@@ -318,6 +417,310 @@ def add_product():
         return jsonify({"error": "Ошибка при добавлении товара в базу данных"}), 500
 
 
+@api_bp.route('/products/import', methods=['POST'])
+@jwt_required()
+def import_products():
+    """
+    Массовый импорт товаров из CSV или NDJSON.
+    Файл передаётся полем file (multipart/form-data) или телом запроса.
+    Формат — параметр format=csv|ndjson, иначе определяется по типу содержимого
+    или расширению файла. Поля записи: article_num, title, description, price,
+    quantity, category, sale, img_url (ссылка на уже загруженное изображение).
+    Товар с существующим артикулом обновляется. Размер порции — chunk_size.
+    Возвращает отчёт по каждой строке.
+    """
+    user = get_token_user()
+    if not user:
+        return jsonify({"error": "Пользователь не найден"}), 404
+    if user.role not in ('suser', 'admin'):
+        return jsonify({"error": "Нет прав доступа"}), 403
+
+    upload = request.files.get('file')
+    if upload and upload.filename:
+        stream = upload.stream
+        source_name = upload.filename.lower()
+        source_type = upload.mimetype
+    else:
+        stream = request.stream
+        source_name = ''
+        source_type = request.mimetype
+
+    fmt = request.args.get('format')
+    if not fmt:
+        if source_name.endswith('.csv') or source_type == 'text/csv':
+            fmt = 'csv'
+        elif source_name.endswith(('.ndjson', '.jsonl')) or source_type in ('application/x-ndjson', 'application/jsonl'):
+            fmt = 'ndjson'
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": "Укажите формат импорта: csv или ndjson"}), 400
+
+    chunk_size = request.args.get('chunk_size', current_app.config.get('IMPORT_CHUNK_SIZE', 1000), type=int)
+    if chunk_size < 1:
+        return jsonify({"error": "chunk_size должен быть больше нуля"}), 400
+
+    importer = ProductImporter(user, chunk_size)
+    read_error = None
+    try:
+        for row_no, record in iter_records(stream, fmt):
+            importer.add(row_no, record)
+    except (UnicodeDecodeError, csv.Error) as e:
+        read_error = e
+    # Записываем последнюю порцию (в т.ч. строки, прочитанные до ошибки)
+    importer.flush()
+
+    if importer.created or importer.updated:
+        bump_catalog_version()
+
+    result = {
+        "created": importer.created,
+        "updated": importer.updated,
+        "failed": importer.failed,
+        "rows": sorted(importer.report, key=lambda r: r['row'])
+    }
+
+    if read_error:
+        logging.warning(f"Импорт товаров прерван: файл не читается ({read_error})")
+        result["error"] = "Не удалось прочитать файл импорта (ожидается UTF-8)"
+        return jsonify(result), 400
+
+    result["success"] = True
+    return jsonify(result), 200
+
+
+def _resolve_bulk_targets(data, user):
+    """
+    Определяет товары для массовой операции.
+    Тело запроса содержит либо список ids, либо filter — словарь с теми же
+    параметрами, что и GET /api/products. Продавец может менять только свои товары.
+
+    Возвращает (condition, not_found, error_response): condition — условие WHERE
+    для UPDATE/DELETE. Условия фильтра подставляются в запрос подзапросом, без
+    выгрузки списка id (число параметров запроса в SQLite ограничено).
+    """
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if (ids is None) == (filters is None):
+        return None, None, (jsonify({"error": "Укажите либо ids, либо filter"}), 400)
+
+    if ids is not None:
+        try:
+            ids = list({int(i) for i in ids})
+        except (ValueError, TypeError):
+            return None, None, (jsonify({"error": "Некорректный формат ID"}), 400)
+        if not ids:
+            return None, None, (jsonify({"error": "Не указаны ID товаров"}), 400)
+        targets = db.session.query(Shop.id, Shop.user_id).filter(Shop.id.in_(ids)).all()
+        found = {t.id for t in targets}
+        not_found = sorted(i for i in ids if i not in found)
+
+        if user.role != 'admin':
+            forbidden = sorted(t.id for t in targets if t.user_id != user.id)
+            if forbidden:
+                return None, None, (jsonify({
+                    "error": "Нет прав доступа. Вы можете изменять только свои товары.",
+                    "forbidden_ids": forbidden
+                }), 403)
+        return Shop.id.in_(sorted(found)), not_found, None
+
+    if not isinstance(filters, dict) or not filters:
+        return None, None, (jsonify({"error": "filter должен быть непустым объектом"}), 400)
+
+    unknown = set(filters) - PRODUCT_FILTER_PARAMS
+    if unknown:
+        return None, None, (jsonify({"error": f"Недопустимые параметры фильтра: {', '.join(sorted(unknown))}"}), 400)
+
+    args = MultiDict()
+    for key, value in filters.items():
+        for item in (value if isinstance(value, list) else [value]):
+            args.add(key, str(item).lower() if isinstance(item, bool) else str(item))
+
+    base = db.select(Shop.id)
+    try:
+        query, _, _ = apply_product_filters(base, args)
+    except ValueError as e:
+        return None, None, (jsonify({"error": str(e)}), 400)
+
+    # Пустые или нечитаемые значения (user_id=abc, category="") не дают условия —
+    # такой фильтр выбрал бы весь каталог
+    if query.whereclause is None and query.get_final_froms() == base.get_final_froms():
+        return None, None, (jsonify({"error": "filter не задаёт ни одного условия"}), 400)
+
+    # Фильтр продавца всегда ограничен его собственными товарами
+    if user.role != 'admin':
+        query = query.filter(Shop.user_id == user.id)
+
+    return Shop.id.in_(query.scalar_subquery()), [], None
+
+
+def _release_cart_items(product_ids):
+    """
+    Готовит товары к удалению: убирает их из текущих корзин.
+    product_ids — список id или SELECT id.
+
+    Возвращает отсортированный список id товаров из истории покупок: такие
+    товары не удаляются, корзины тогда не меняются. Проверка явная — SQLite
+    по умолчанию не проверяет внешние ключи, и без неё покупки ссылались бы
+    на удалённые товары.
+    """
+    purchased = sorted(db.session.execute(
+        db.select(CartItem.product_id).where(
+            CartItem.product_id.in_(product_ids),
+            CartItem.is_purchased.is_(True)
+        ).distinct()
+    ).scalars())
+    if purchased:
+        return purchased
+
+    CartItem.query.filter(
+        CartItem.product_id.in_(product_ids),
+        CartItem.is_purchased.is_(False)
+    ).delete(synchronize_session=False)
+    return []
+
+
+@api_bp.route('/products/bulk', methods=['PATCH'])
+@jwt_required()
+def bulk_update_products():
+    """
+    Массовое изменение товаров одним UPDATE.
+    Тело: {"ids": [...]} или {"filter": {...}} и "set" с полями:
+    price, quantity, quantity_delta (изменение остатка), sale.
+    """
+    user = get_token_user()
+    if not user:
+        return jsonify({"error": "Пользователь не найден"}), 404
+    if user.role not in ('suser', 'admin'):
+        return jsonify({"error": "Нет прав доступа"}), 403
+
+    data = request.get_json(silent=True) or {}
+    changes = data.get('set')
+    if not isinstance(changes, dict) or not changes:
+        return jsonify({"error": "Не указаны изменения (set)"}), 400
+
+    unknown = set(changes) - {'price', 'quantity', 'quantity_delta', 'sale'}
+    if unknown:
+        return jsonify({"error": f"Недопустимые поля: {', '.join(sorted(unknown))}"}), 400
+    if 'quantity' in changes and 'quantity_delta' in changes:
+        return jsonify({"error": "Нельзя одновременно указывать quantity и quantity_delta"}), 400
+
+    values = {}
+    if 'price' in changes:
+        try:
+            price = float(changes['price'])
+        except (ValueError, TypeError):
+            return jsonify({"error": "Цена должна быть числом"}), 400
+        if price < 0:
+            return jsonify({"error": "Цена не может быть отрицательной"}), 400
+        values[Shop.price] = price
+
+    if 'quantity' in changes:
+        quantity = changes['quantity']
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            return jsonify({"error": "Количество должно быть целым числом"}), 400
+        if quantity < 0:
+            return jsonify({"error": "Количество не может быть отрицательным"}), 400
+        values[Shop.quantity] = quantity
+
+    if 'quantity_delta' in changes:
+        delta = changes['quantity_delta']
+        if not isinstance(delta, int) or isinstance(delta, bool):
+            return jsonify({"error": "quantity_delta должен быть целым числом"}), 400
+        # Остаток не опускается ниже нуля
+        values[Shop.quantity] = db.case((Shop.quantity + delta < 0, 0), else_=Shop.quantity + delta)
+
+    if 'sale' in changes:
+        if not isinstance(changes['sale'], bool):
+            return jsonify({"error": "Поле 'sale' должно быть булевым"}), 400
+        values[Shop.sale] = changes['sale']
+
+    condition, not_found, error = _resolve_bulk_targets(data, user)
+    if error:
+        return error
+
+    # id нужны только для вытеснения страниц из кэша
+    target_ids = db.session.execute(db.select(Shop.id).where(condition)).scalars().all()
+    if not target_ids:
+        return jsonify({"success": True, "updated_count": 0, "not_found": not_found}), 200
+
+    values[Shop.updated_at] = utc_now()
+    try:
+        updated_count = db.session.execute(
+            db.update(Shop).where(condition).values(values),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logging.exception("Ошибка массового изменения товаров")
+        return jsonify({"error": "Ошибка при обновлении товаров"}), 500
+
+    bump_catalog_version()
+    evict_product_pages(target_ids)
+    return jsonify({"success": True, "updated_count": updated_count, "not_found": not_found}), 200
+
+
+@api_bp.route('/products/bulk', methods=['DELETE'])
+@jwt_required()
+def bulk_delete_products():
+    """
+    Массовое удаление товаров одним DELETE.
+    Тело: {"ids": [...]} или {"filter": {...}}.
+    Файлы изображений удаляются в фоне, если на них не ссылаются другие товары.
+    """
+    user = get_token_user()
+    if not user:
+        return jsonify({"error": "Пользователь не найден"}), 404
+    if user.role not in ('suser', 'admin'):
+        return jsonify({"error": "Нет прав доступа"}), 403
+
+    data = request.get_json(silent=True) or {}
+    condition, not_found, error = _resolve_bulk_targets(data, user)
+    if error:
+        return error
+
+    # id и изображения — для кэшей, подсказок и удаления файлов после COMMIT
+    targets = db.session.execute(db.select(Shop.id, Shop.link_img).where(condition)).all()
+    target_ids = [t.id for t in targets]
+    if not target_ids:
+        return jsonify({"success": True, "deleted_count": 0, "not_found": not_found}), 200
+
+    try:
+        # Товары уходят из текущих корзин; товары из истории покупок не удаляются
+        purchased = _release_cart_items(db.select(Shop.id).where(condition))
+        if purchased:
+            db.session.rollback()
+            return jsonify({
+                "error": "Некоторые товары есть в истории покупок и не могут быть удалены",
+                "purchased_ids": purchased
+            }), 409
+        deleted_count = db.session.execute(
+            db.delete(Shop).where(condition),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        # После DELETE: условие фильтра с поиском читает поисковый индекс
+        unindex_products(db.session.connection(), target_ids)
+
+        # Файлы, на которые ещё ссылаются другие товары, не удаляем
+        links = {t.link_img for t in targets if t.link_img}
+        still_used = referenced_images(links)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Некоторые товары есть в истории покупок и не могут быть удалены"}), 409
+    except Exception:
+        db.session.rollback()
+        logging.exception("Ошибка массового удаления товаров")
+        return jsonify({"error": "Ошибка при удалении товаров"}), 500
+
+    bump_catalog_version()
+    suggest_index.remove(target_ids)
+    evict_product_pages(target_ids)
+    run_in_background(delete_image_files, current_app.static_folder, links - still_used,
+                      current_app.config.get('IMAGE_GC_GRACE', 24 * 3600))
+
+    return jsonify({"success": True, "deleted_count": deleted_count, "not_found": not_found}), 200
+
+
 @api_bp.route('/products/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_product(id):
@@ -328,7 +731,7 @@ def update_product(id):
       - multipart/form-data (форма с изображением)
     """
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_token_user()
     if not user:
         return jsonify({"error": "Пользователь не найден"}), 404
 
@@ -423,9 +826,14 @@ def update_product(id):
             product.sale = 'sale' in request.form
 
         # Изображение
+        old_link_img = product.link_img
         if image_file and image_file.filename:
             try:
-                product.link_img = save_product_image(image_file)
+                link_img = save_product_image(image_file)
+                # Та же картинка даёт тот же файл — копии остаются в силе
+                if link_img != old_link_img:
+                    product.link_img = link_img
+                    product.image_variants = None
             except ValueError as e:
                 return jsonify({"error": str(e)}), 400
             except Exception as e:
@@ -434,23 +842,18 @@ def update_product(id):
 
         # Сохраняем изменения
         db.session.commit()
+        bump_catalog_version()
+        if product.link_img != old_link_img:
+            schedule_image_variants(product.id, product.link_img)
+            # Прежний файл удаляем, если на него не ссылаются другие товары
+            if old_link_img not in referenced_images([old_link_img]):
+                run_in_background(delete_image_files, current_app.static_folder, [old_link_img],
+                                  current_app.config.get('IMAGE_GC_GRACE', 24 * 3600))
 
         return jsonify({
             "success": True,
             "message": "Товар успешно обновлён",
-            "product": {
-                "id": product.id,
-                "article_num": product.article_num,
-                "user_id": product.user_id,
-                "title": product.title,
-                "description": product.description,
-                "price": product.price,
-                "quantity": product.quantity,
-                "img_url": product.link_img,
-                "created_at": product.created_at.isoformat(),
-                "sale": product.sale,
-                "category": product.category
-            }
+            "product": serialize_product(product)
         }), 200
 
     except Exception as e:
@@ -468,7 +871,7 @@ def delete_product(id):
     - Продавец — только свои.
     """
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_token_user()
     if not user:
         return jsonify({"error": "Пользователь не найден"}), 404
 
@@ -484,17 +887,20 @@ def delete_product(id):
         return jsonify({"error": "Нет прав доступа. Вы можете удалять только свои товары."}), 403
 
     try:
-        if product.link_img and product.link_img != "/img/avatars/default_product.png":
-            try:
-                relative_path = product.link_img.lstrip("/")
-                full_path = Path(current_app.static_folder) / relative_path
-                if full_path.exists():
-                    os.remove(full_path)
-            except Exception as e:
-                logging.warning(f"Не удалось удалить файл изображения {full_path}: {e}")
+        # Товар уходит из текущих корзин; товар из истории покупок не удаляется
+        if _release_cart_items([product.id]):
+            db.session.rollback()
+            return jsonify({"error": "Товар есть в истории покупок и не может быть удалён"}), 409
 
+        link_img = product.link_img
         db.session.delete(product)
         db.session.commit()
+        bump_catalog_version()
+
+        # Файл изображения и его копии — если на них не ссылаются другие товары
+        if link_img not in referenced_images([link_img]):
+            run_in_background(delete_image_files, current_app.static_folder, [link_img],
+                              current_app.config.get('IMAGE_GC_GRACE', 24 * 3600))
 
         return jsonify({
             "success": True,
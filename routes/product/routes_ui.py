@@ -2,7 +2,8 @@
 
 from flask import Blueprint, render_template, redirect, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import User, Shop
+from models import Shop
+from utils.user_sessions import get_token_user
 
 
 product_bp = Blueprint('product_edit', __name__)
@@ -13,7 +14,7 @@ product_bp = Blueprint('product_edit', __name__)
 @jwt_required()
 def product():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_token_user()
     
     if not user:
         return redirect(url_for('session.login'))
@@ -36,7 +37,7 @@ def add_product():
 @jwt_required()
 def edit_product(product_id):
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_token_user()
     
     if not user:
         return render_template('404.html'), 404
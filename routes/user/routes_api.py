@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, CartItem, Shop, User
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import joinedload
+from models import db, CartItem, Shop
+from utils.user_sessions import get_current_user
 from datetime import datetime, timezone
+from utils.catalog_cache import bump_catalog_version
 
 user_api_bp = Blueprint('user_api', __name__, url_prefix='/api/user')
 
@@ -9,8 +12,7 @@ user_api_bp = Blueprint('user_api', __name__, url_prefix='/api/user')
 @user_api_bp.route('/cart', methods=['POST'])
 @jwt_required()
 def add_to_cart():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({"error": "Пользователь не найден"}), 404
 
@@ -65,8 +67,7 @@ def add_to_cart():
 @user_api_bp.route('/cart', methods=['DELETE'])
 @jwt_required()
 def remove_from_cart():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({"error": "Пользователь не найден"}), 404
 
@@ -102,18 +103,19 @@ def remove_from_cart():
 @user_api_bp.route('/checkout', methods=['POST'])
 @jwt_required()
 def checkout():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({"error": "Пользователь не найден"}), 404
 
-    cart_items = CartItem.query.filter_by(user_id=user.id, is_purchased=False).all()
+    # Товары корзины загружаются тем же запросом, а не по одному на позицию
+    cart_items = CartItem.query.options(joinedload(CartItem.product)) \
+        .filter_by(user_id=user.id, is_purchased=False).all()
     if not cart_items:
         return jsonify({"error": "Корзина пуста"}), 400
 
     errors = []
     for item in cart_items:
-        product = Shop.query.get(item.product_id)
+        product = item.product
         if not product:
             errors.append(f"Товар с ID {item.product_id} удалён из каталога.")
             continue
@@ -129,7 +131,7 @@ def checkout():
         return jsonify({"error": "Невозможно оформить заказ", "details": errors}), 400
 
     for item in cart_items:
-        product = Shop.query.get(item.product_id)
+        product = item.product
         product.quantity -= item.quantity
         if product.quantity < 0:
             product.quantity = 0
@@ -137,14 +139,15 @@ def checkout():
         item.purchased_at = datetime.now(timezone.utc)
 
     db.session.commit()
+    # Остатки на складе изменились
+    bump_catalog_version()
     return jsonify({"success": True, "message": "Заказ успешно оформлен"})
 
 
 @user_api_bp.route('/cart/count')
 @jwt_required()
 def cart_count():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({"count": 0}), 404
 
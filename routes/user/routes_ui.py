@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, make_response, redirect, url_for
-from utils.user_sessions import get_safe_user_id
-from models import CartItem, User
+from sqlalchemy.orm import joinedload
+from utils.user_sessions import get_safe_user_id, get_current_user
+from models import CartItem
 
 
 user_ui_bp = Blueprint('user_ui', __name__, url_prefix='/user')
@@ -36,9 +37,11 @@ def cart_page():
         response.set_cookie('access_token', '', expires=0)
         return response
 
-    user = User.query.get(int(user_id))
+    user = get_current_user()
     if not user:
         return redirect(url_for('session.login'))
 
-    cart_items = CartItem.query.filter_by(user_id=user.id, is_purchased=False).all()
+    # Товары корзины загружаются тем же запросом, а не по одному на позицию
+    cart_items = CartItem.query.options(joinedload(CartItem.product)) \
+        .filter_by(user_id=user.id, is_purchased=False).all()
     return render_template('user/cart.html', cart_items=cart_items)
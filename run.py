@@ -12,7 +12,16 @@ from routes.user.routes_api import user_api_bp
 from extensions import mail, jwt, db, migrate
 from config.config import Config, INSTANCE_DIR
 from utils.logger import app_loggers
-from models import IPAttemptLog
+from commands import register_commands
+from utils.catalog_cache import init_catalog_cache
+from utils.page_cache import init_page_cache
+from utils.token_revocation import init_token_revocation
+from utils.ip_blocklist import init_ip_blocklist, is_ip_blocked
+from utils.image_variants import build_srcset
+from utils.static_cache import init_static_cache
+from utils.assets import init_assets
+from utils.image_gc import start_image_gc
+from utils.compression import init_compression
 
 
 def create_app():
@@ -30,6 +39,9 @@ def create_app():
     migrate.init_app(app, db)
     mail.init_app(app)
     jwt.init_app(app)
+    init_catalog_cache(app)
+    init_page_cache(app)
+    init_token_revocation(app)
 
 
     # Регистрация blueprint'ов
@@ -43,6 +55,25 @@ def create_app():
     app.register_blueprint(user_ui_bp) 
     app.register_blueprint(user_api_bp)
 
+    # Сжатие ответов gzip/brotli. Регистрируется первым из after_request-хуков
+    # приложения, поэтому выполняется последним — над окончательным телом ответа
+    init_compression(app)
+
+    # CLI-команды (flask <команда>)
+    register_commands(app)
+
+    # Фильтр шаблонов: srcset по уменьшенным копиям изображения товара
+    app.add_template_filter(build_srcset, 'srcset')
+
+    # CSS/JS с хэшем в имени и сжатыми копиями (после flask build-assets)
+    init_assets(app)
+
+    # Долгоживущие заголовки кэширования для файлов с хэшем в имени
+    init_static_cache(app)
+
+    # Заблокированные IP-адреса и подсети — в память процесса (проверка без SQL)
+    init_ip_blocklist(app)
+
  
     @app.before_request
     def block_blocked_ips():
@@ -50,9 +81,10 @@ def create_app():
         Проверяет, заблокирован ли IP-адрес клиента на уровне приложения.
 
         Перед каждым входящим запросом функция извлекает IP-адрес клиента
-        через `request.remote_addr`, ищет соответствующую запись в таблице
-        `IPAttemptLog` и, если запись существует и флаг `is_blocked` установлен
-        в `True`, немедленно прерывает обработку запроса с HTTP-статусом 403.
+        через `request.remote_addr` и проверяет его по таблице заблокированных
+        адресов и подсетей в памяти процесса (utils/ip_blocklist.py, источник —
+        записи `IPAttemptLog` с `is_blocked=True`). Если адрес заблокирован,
+        немедленно прерывает обработку запроса с HTTP-статусом 403.
 
         Примечание:
             - Функция предназначена исключительно для демонстрации логики
@@ -70,10 +102,8 @@ def create_app():
                     (запрос продолжает обработку).
         """
         client_ip = request.remote_addr
-        if client_ip:
-            ip_log = IPAttemptLog.query.filter_by(ip_address=client_ip).first()
-            if ip_log and ip_log.is_blocked:
-                return jsonify({"error": "Ваш IP-адрес заблокирован."}), 403
+        if client_ip and is_ip_blocked(client_ip, app.config.get('BLOCKED_IPS_TTL', 60)):
+            return jsonify({"error": "Ваш IP-адрес заблокирован."}), 403
 
     return app
 
@@ -81,5 +111,9 @@ def create_app():
 if __name__ == '__main__':
     app = create_app()
     app_loggers(app)    
+    # Периодическая очистка папки изображений от файлов без ссылок (IMAGE_GC_INTERVAL).
+    # С debug=True запросы обслуживает дочерний процесс перезагрузчика — поток только в нём
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_image_gc(app)
     app.run(host='0.0.0.0', port=5000, debug=True)
     # app.run(debug=True)
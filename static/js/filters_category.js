@@ -57,6 +57,46 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
 
+    // --- Подсказки при вводе (из индекса в памяти сервера, без запросов к БД) ---
+    const searchInput = document.getElementById('search-input');
+    if (searchInput) {
+        const suggestList = document.createElement('datalist');
+        suggestList.id = 'search-suggestions';
+        searchInput.setAttribute('list', suggestList.id);
+        searchInput.setAttribute('autocomplete', 'off');
+        searchInput.after(suggestList);
+
+        let suggestTimer = null;
+        let suggestController = null;
+        searchInput.addEventListener('input', () => {
+            clearTimeout(suggestTimer);
+            const prefix = searchInput.value.trim();
+            if (!prefix) {
+                suggestList.innerHTML = '';
+                return;
+            }
+            suggestTimer = setTimeout(async () => {
+                suggestController?.abort();
+                suggestController = new AbortController();
+                try {
+                    const params = new URLSearchParams({ prefix, limit: 8 });
+                    const response = await fetch(`/api/products/suggest?${params}`, { signal: suggestController.signal });
+                    if (!response.ok) return;
+                    const data = await response.json();
+                    suggestList.innerHTML = '';
+                    data.items.forEach(item => {
+                        const option = document.createElement('option');
+                        option.value = item.title;
+                        option.label = `Артикул: ${item.article_num}`;
+                        suggestList.appendChild(option);
+                    });
+                } catch (error) {
+                    if (error.name !== 'AbortError') console.error('Ошибка загрузки подсказок:', error);
+                }
+            }, 150);
+        });
+    }
+
     // --- Обновление активных фильтров ---
     function updateActiveFilters() {
         // Собираем выбранные категории
@@ -124,71 +164,25 @@ document.addEventListener('DOMContentLoaded', function () {
             }
 
             // Остальные фильтры
-            if (appliedFilters.title) params.append('title', appliedFilters.title);
+            if (appliedFilters.title) params.append('q', appliedFilters.title);
             if (appliedFilters.price_min !== undefined) params.append('price_min', appliedFilters.price_min);
             if (appliedFilters.price_max !== undefined) params.append('price_max', appliedFilters.price_max);
             if (appliedFilters.sale) params.append('sale', appliedFilters.sale);
 
             params.append('page', page);
             params.append('per_page', 100);
+            // Общее количество в сетке не выводится — не тратим на него COUNT
+            params.append('count', 'none');
+
+            // Только поля, которые выводятся в карточке; описание обрезается на сервере
+            // (на символ длиннее лимита truncateText, чтобы он поставил многоточие).
+            // Параметры совпадают со встроенной первой страницей (INITIAL_PAGE_ARGS на сервере)
+            params.append('fields', 'id,article_num,title,description,price,img_url,img_srcset,sale');
+            params.append('description_preview', 101);
 
             const response = await fetch(`/api/products?${params}`);
             const data = await response.json();
-
-            const template = document.getElementById('product-card-template');
-            if (page === 1) productContainer.innerHTML = '';
-
-            if (!data.items?.length) {
-                productContainer.innerHTML = '<p>Товаров не найдено.</p>';
-                return;
-            }
-
-            data.items.forEach(product => {
-                const clone = template.content.cloneNode(true);
-                const img = clone.querySelector('.img_cont');
-                const articleNum = clone.querySelector('.article_num p');
-                const titleLink = clone.querySelector('.title_product a');
-                const description = clone.querySelector('.description p');
-                const price = clone.querySelector('.price_product p');
-                const badge = clone.querySelector('.badge');
-
-                img.src = `/static${product.img_url}`;
-                img.alt = product.title;
-                articleNum.textContent = `Артикул: ${product.article_num}`;
-                titleLink.textContent = product.title;
-                titleLink.href = `/product/${product.id}`;
-                price.textContent = `${product.price} ₽`;
-                description.textContent = truncateText(product.description, 100);
-
-                badge.style.display = product.sale ? 'flex' : 'none';
-
-                // === Кнопки корзины ===
-                const blockBuy = clone.querySelector('.block_buy');
-                if (blockBuy) {
-                    const userActions = document.createElement('div');
-                    userActions.className = 'user-actions';
-
-                    const buyBtn = document.createElement('div');
-                    buyBtn.className = 'btn_buy';
-                    buyBtn.dataset.productId = product.id;
-                    buyBtn.innerHTML = '<div class="btn_text"></div>Купить';
-
-                    const cartLink = document.createElement('a');
-                    cartLink.href = '#';
-                    cartLink.className = 'cart-icon';
-                    cartLink.title = 'Добавить в корзину';
-                    cartLink.dataset.productId = product.id;
-                    cartLink.innerHTML = `<img class="img_c" src="/static/img/other/cart-add-mini.svg" alt="В корзину" width="25" height="25">`;
-
-                    userActions.appendChild(buyBtn);
-                    userActions.appendChild(cartLink);
-                    blockBuy.appendChild(userActions);
-
-                    userActions.style.display = (window.userRole === 'user') ? '' : 'none';
-                }
-
-                productContainer.appendChild(clone);
-            });
+            renderProducts(data, page);
 
         } catch (error) {
             console.error('Ошибка загрузки товаров:', error);
@@ -196,6 +190,96 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
-    // Загружаем товары при старте
-    loadProducts(1);
+    // --- Вывод карточек товаров (ответ /api/products) ---
+    function renderProducts(data, page) {
+        const template = document.getElementById('product-card-template');
+        if (page === 1) productContainer.innerHTML = '';
+
+        if (!data.items?.length) {
+            productContainer.innerHTML = '<p>Товаров не найдено.</p>';
+            return;
+        }
+
+        data.items.forEach(product => {
+            const clone = template.content.cloneNode(true);
+            const img = clone.querySelector('.img_cont');
+            const articleNum = clone.querySelector('.article_num p');
+            const titleLink = clone.querySelector('.title_product a');
+            const description = clone.querySelector('.description p');
+            const price = clone.querySelector('.price_product p');
+            const badge = clone.querySelector('.badge');
+
+            img.src = `/static${product.img_url}`;
+            // Уменьшенные копии: браузер выбирает ширину по размеру карточки
+            const srcset = product.img_srcset?.webp || product.img_srcset?.jpeg;
+            if (srcset) {
+                img.srcset = srcset;
+                img.sizes = '(max-width: 600px) 100vw, 320px';
+            }
+            img.loading = 'lazy';
+            img.alt = product.title;
+            articleNum.textContent = `Артикул: ${product.article_num}`;
+            titleLink.textContent = product.title;
+            titleLink.href = `/product/${product.id}`;
+            price.textContent = `${product.price} ₽`;
+            description.textContent = truncateText(product.description, 100);
+
+            badge.style.display = product.sale ? 'flex' : 'none';
+
+            // === Кнопки корзины ===
+            const blockBuy = clone.querySelector('.block_buy');
+            if (blockBuy) {
+                const userActions = document.createElement('div');
+                userActions.className = 'user-actions';
+
+                const buyBtn = document.createElement('div');
+                buyBtn.className = 'btn_buy';
+                buyBtn.dataset.productId = product.id;
+                buyBtn.innerHTML = '<div class="btn_text"></div>Купить';
+
+                const cartLink = document.createElement('a');
+                cartLink.href = '#';
+                cartLink.className = 'cart-icon';
+                cartLink.title = 'Добавить в корзину';
+                cartLink.dataset.productId = product.id;
+                cartLink.innerHTML = `<img class="img_c" src="/static/img/other/cart-add-mini.svg" alt="В корзину" width="25" height="25">`;
+
+                userActions.appendChild(buyBtn);
+                userActions.appendChild(cartLink);
+                blockBuy.appendChild(userActions);
+
+                userActions.style.display = (window.userRole === 'user') ? '' : 'none';
+            }
+
+            productContainer.appendChild(clone);
+        });
+    }
+
+    // --- Количество товаров рядом с категориями (фасеты каталога) ---
+    function renderCategoryCounts(facets) {
+        const counts = {};
+        facets.categories.forEach(item => { counts[item.category] = item.count; });
+        categoryCheckboxes.forEach(checkbox => {
+            const text = checkbox.closest('label')?.querySelector('.text');
+            if (!text) return;
+            let counter = text.querySelector('.facet-count');
+            if (!counter) {
+                counter = document.createElement('span');
+                counter.className = 'facet-count';
+                text.appendChild(counter);
+            }
+            counter.textContent = ` (${counts[checkbox.value] || 0})`;
+        });
+    }
+
+    // Первая страница каталога встроена в HTML сервером — выводим её без запроса.
+    // Если данных нет (старая версия страницы в кэше браузера), загружаем товары
+    const initialData = document.getElementById('catalog-initial');
+    const initial = initialData ? JSON.parse(initialData.textContent) : null;
+    if (initial) {
+        renderProducts(initial.products, 1);
+        renderCategoryCounts(initial.facets);
+    } else {
+        loadProducts(1);
+    }
 });
\ No newline at end of file
@@ -33,6 +33,27 @@ document.addEventListener('DOMContentLoaded', function () {
         if (gridBody) gridBody.innerHTML = '';
     }
 
+    // Читает ответ в формате NDJSON (один JSON-объект в строке) по мере поступления
+    async function readNdjson(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const items = [];
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => items.push(JSON.parse(line)));
+
+            if (done) break;
+        }
+        if (buffer.trim()) items.push(JSON.parse(buffer));
+        return items;
+    }
+
     // === Загрузка товаров ===
     async function loadProducts() {
         if (isLoading) return;
@@ -44,6 +65,8 @@ document.addEventListener('DOMContentLoaded', function () {
         const filters = getFilters();
         const url = new URL('/api/products', window.location.origin);
         url.searchParams.append('all', '1');
+        // Потоковая выгрузка: сервер не собирает весь список в памяти
+        url.searchParams.append('format', 'ndjson');
 
         // Фильтрация по роли пользователя
         if (window.CURRENT_USER_ROLE === 'suser' && window.CURRENT_USER_ID) {
@@ -64,7 +87,7 @@ document.addEventListener('DOMContentLoaded', function () {
 
             if (!response.ok) throw new Error(`HTTP ${response.status}`);
 
-            const data = await response.json();
+            const data = { items: await readNdjson(response) };
 
             if (data.items && Array.isArray(data.items) && data.items.length > 0) {
                 const template = document.getElementById('product-row-template');
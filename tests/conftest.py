@@ -0,0 +1,43 @@
+# Общие фикстуры тестов: приложение на временной SQLite и клиенты с авторизацией.
+
+import os
+import tempfile
+
+os.environ.setdefault('SECRET_KEY', 'test-secret-key-for-pytest-0123456789')
+_db_dir = tempfile.mkdtemp(prefix='siteshop-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.sqlite')}"
+
+from datetime import datetime, timezone
+import pytest
+from run import create_app
+from extensions import db
+from models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        for name, role in (('admin', 'admin'), ('seller', 'suser'), ('buyer', 'user')):
+            user = User(username=name, email=f'{name}@example.com', role=role,
+                        confirm_email=True, created_at=datetime.now(timezone.utc))
+            user.set_password('password')
+            db.session.add(user)
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def login(app):
+    """Возвращает тестовый клиент, авторизованный под указанным пользователем."""
+    def make_client(username):
+        client = app.test_client()
+        response = client.post('/login', json={'username': username, 'password': 'password'})
+        assert response.status_code == 200, response.data
+        client.set_cookie('access_token', response.get_json()['access_token'])
+        return client
+    return make_client
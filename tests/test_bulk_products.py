@@ -0,0 +1,87 @@
+# Массовые операции /api/products/bulk: выбор товаров по ids и по фильтру.
+
+from datetime import datetime, timezone
+import pytest
+from extensions import db
+from models import Shop, CartItem
+
+
+@pytest.fixture
+def products(app):
+    # Товары 0–3 принадлежат продавцу (id=2), 4–5 — администратору (id=1)
+    for i in range(6):
+        db.session.add(Shop(article_num=f'B{i:03d}', user_id=2 if i < 4 else 1, title=f'Товар {i}',
+                            description='Описание', price=100 + i, quantity=5,
+                            link_img='/img/products/x.png', category='Шины' if i % 2 else 'Диски'))
+    db.session.commit()
+    return {p.article_num: p.id for p in Shop.query.all()}
+
+
+@pytest.mark.parametrize('filters', [
+    {'titel': 'Товар'},
+    {'category': ''},
+    {'user_id': 'abc'},
+])
+def test_filter_without_conditions_is_rejected(login, products, filters):
+    client = login('admin')
+    response = client.patch('/api/products/bulk', json={'filter': filters, 'set': {'sale': True}})
+    assert response.status_code == 400
+    assert Shop.query.filter_by(sale=True).count() == 0
+
+
+def test_filter_update_is_limited_to_seller_products(login, products):
+    client = login('seller')
+    response = client.patch('/api/products/bulk', json={'filter': {'category': 'Шины'}, 'set': {'sale': True}})
+    assert response.status_code == 200
+    assert response.get_json()['updated_count'] == 2
+    assert {p.article_num for p in Shop.query.filter_by(sale=True)} == {'B001', 'B003'}
+
+
+def test_ids_of_other_seller_are_forbidden(login, products):
+    client = login('seller')
+    response = client.patch('/api/products/bulk', json={'ids': [products['B000'], products['B004']],
+                                                        'set': {'quantity': 0}})
+    assert response.status_code == 403
+    assert response.get_json()['forbidden_ids'] == [products['B004']]
+
+
+def test_filter_delete(login, products):
+    client = login('admin')
+    response = client.delete('/api/products/bulk', json={'filter': {'category': 'Диски', 'price_max': 103}})
+    assert response.status_code == 200
+    assert response.get_json()['deleted_count'] == 2
+    assert sorted(p.article_num for p in Shop.query.all()) == ['B001', 'B003', 'B004', 'B005']
+
+
+def _add_to_cart(product_id, purchased):
+    db.session.add(CartItem(user_id=3, product_id=product_id, quantity=1, is_purchased=purchased,
+                            added_at=datetime.now(timezone.utc)))
+    db.session.commit()
+
+
+def test_delete_removes_products_from_carts(login, products):
+    _add_to_cart(products['B000'], purchased=False)
+    response = login('seller').delete('/api/products/bulk', json={'ids': [products['B000'], products['B001']]})
+    assert response.status_code == 200
+    assert response.get_json()['deleted_count'] == 2
+    assert CartItem.query.count() == 0
+
+
+def test_delete_keeps_purchase_history(login, products):
+    # SQLite не проверяет внешние ключи — покупка не должна остаться без товара
+    _add_to_cart(products['B000'], purchased=False)
+    _add_to_cart(products['B002'], purchased=True)
+    response = login('seller').delete('/api/products/bulk', json={'filter': {'category': 'Диски'}})
+    assert response.status_code == 409
+    assert response.get_json()['purchased_ids'] == [products['B002']]
+    assert Shop.query.count() == 6
+    assert CartItem.query.count() == 2
+
+
+def test_single_delete_handles_cart_items_the_same_way(login, products):
+    client = login('seller')
+    _add_to_cart(products['B000'], purchased=False)
+    _add_to_cart(products['B001'], purchased=True)
+    assert client.delete(f"/api/products/{products['B000']}").status_code == 200
+    assert client.delete(f"/api/products/{products['B001']}").status_code == 409
+    assert [item.product_id for item in CartItem.query] == [products['B001']]
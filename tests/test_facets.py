@@ -0,0 +1,23 @@
+# Фасеты каталога: гистограмма цен с дробными ценами.
+
+import pytest
+from extensions import db
+from models import Shop
+
+
+@pytest.fixture
+def products(app):
+    for i, price in enumerate((100.5, 9999.9, 10000, 15000.5, 19999.99, 25000.25)):
+        db.session.add(Shop(article_num=f'F{i:03d}', user_id=2, title=f'Товар {i}', description='Описание',
+                            price=price, quantity=1, link_img='/img/products/x.png', category='Запчасти'))
+    db.session.commit()
+
+
+def test_price_histogram_with_fractional_prices(app, products):
+    response = app.test_client().get('/api/products/facets', query_string={'bucket_size': 10000})
+    assert response.status_code == 200
+    assert response.get_json()['price_histogram'] == [
+        {'from': 0, 'to': 10000, 'count': 2},
+        {'from': 10000, 'to': 20000, 'count': 3},
+        {'from': 20000, 'to': 30000, 'count': 1},
+    ]
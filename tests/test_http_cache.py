@@ -0,0 +1,20 @@
+# ETag списков каталога: 304 при неизменном каталоге, новый ETag после записи.
+
+from unittest import mock
+from utils import catalog_cache
+from utils.catalog_cache import bump_catalog_version
+
+
+def test_catalog_etag_changes_with_version_and_time(app):
+    client = app.test_client()
+    etag = client.get('/api/products').headers['ETag']
+    assert client.get('/api/products', headers={'If-None-Match': etag}).status_code == 304
+
+    bump_catalog_version()
+    assert client.get('/api/products', headers={'If-None-Match': etag}).status_code == 200
+
+    # Запись в другом воркере здешнюю версию не меняет — ETag обновляется по истечении TTL
+    etag = client.get('/api/products').headers['ETag']
+    later = catalog_cache.time.time() + catalog_cache.listing_cache.ttl
+    with mock.patch.object(catalog_cache.time, 'time', return_value=later):
+        assert client.get('/api/products', headers={'If-None-Match': etag}).status_code == 200
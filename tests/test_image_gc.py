@@ -0,0 +1,33 @@
+# Сборка мусора в папке изображений: оригиналы без ссылок и их копии.
+
+import os
+import time
+from extensions import db
+from models import Shop
+from utils.image_gc import collect_orphan_images
+
+
+def _touch(path, age):
+    path.write_bytes(b'x' * 10)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+def test_collect_orphan_images(app, tmp_path):
+    upload = tmp_path / 'img' / 'products'
+    upload.mkdir(parents=True)
+    week = 7 * 24 * 3600
+    for name in ('used.png', 'used-320w.webp', 'orphan.png', 'orphan-320w.webp', 'orphan-640w.jpg',
+                 'lost-320w.webp', 'x.upload'):
+        _touch(upload / name, week)
+    _touch(upload / 'fresh.png', 0)
+    db.session.add(Shop(article_num='G1', user_id=2, title='Товар', description='Описание', price=1,
+                        quantity=1, link_img='/img/products/used.png', category='Запчасти'))
+    db.session.commit()
+
+    dry = collect_orphan_images(str(tmp_path), str(upload), 3600, batch_size=1, dry_run=True)
+    report = collect_orphan_images(str(tmp_path), str(upload), 3600, batch_size=1)
+
+    assert dry['files'] == report['files'] == 5
+    assert dry['bytes'] == report['bytes'] == 50
+    assert sorted(p.name for p in upload.iterdir()) == ['fresh.png', 'used-320w.webp', 'used.png']
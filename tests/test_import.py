@@ -0,0 +1,26 @@
+# Импорт товаров из CSV: строка без изображения получает изображение-заглушку.
+
+import os
+from models import Shop
+from utils.add_img import DEFAULT_PRODUCT_IMAGE
+
+
+def test_default_image_is_served(app):
+    assert os.path.isfile(os.path.join(app.static_folder, DEFAULT_PRODUCT_IMAGE.lstrip('/')))
+    response = app.test_client().get(f'/static{DEFAULT_PRODUCT_IMAGE}')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    response.close()
+
+
+def test_import_row_without_image_uses_default(login):
+    client = login('seller')
+    csv_body = (
+        'article_num,title,description,price,quantity,category\n'
+        'IMP-1,Товар,Описание,100,1,Запчасти\n'
+    )
+    response = client.post('/api/products/import?format=csv', data=csv_body.encode('utf-8'),
+                           content_type='text/csv')
+    assert response.status_code == 200, response.data
+    assert response.get_json()['created'] == 1
+    assert Shop.query.filter_by(article_num='IMP-1').one().link_img == DEFAULT_PRODUCT_IMAGE
@@ -0,0 +1,27 @@
+# Блокировка и разблокировка IP-адресов и подсетей администратором.
+
+from utils.ip_blocklist import is_ip_blocked
+
+
+def test_unblock_network_written_differently(app, login):
+    client = login('admin')
+    response = client.patch('/admin/api/logs/block', json={'ip_addresses': ['10.0.0.7/24']})
+    assert response.status_code == 200
+    assert is_ip_blocked('10.0.0.99')
+
+    # Та же подсеть в другой записи: адрес хоста вместо адреса сети
+    response = client.patch('/admin/api/logs/unblock', json={'ip_addresses': ['10.0.0.200/24']})
+    assert response.status_code == 200
+    assert response.get_json()['unblocked_count'] == 1
+    assert not is_ip_blocked('10.0.0.99')
+
+
+def test_unblock_requires_admin(app, login):
+    response = login('seller').patch('/admin/api/logs/unblock', json={'ip_addresses': ['10.0.0.0/24']})
+    assert response.status_code == 403
+    assert app.test_client().patch('/admin/api/logs/unblock', json={'ip_addresses': ['10.0.0.0/24']}).status_code == 401
+
+
+def test_unblock_rejects_invalid_network(login):
+    response = login('admin').patch('/admin/api/logs/unblock', json={'ip_addresses': ['10.0.0.0/99']})
+    assert response.status_code == 400
@@ -0,0 +1,36 @@
+# Курсорная пагинация /api/products: обход всех страниц для каждой сортировки.
+
+import pytest
+from extensions import db
+from models import Shop
+from routes.product.routes_api import SORT_MAPPING
+
+
+@pytest.fixture
+def products(app):
+    # created_at не задаётся — берётся func.now(), у быстро вставленных товаров
+    # совпадает до секунды; цены и остатки тоже повторяются
+    for i in range(12):
+        db.session.add(Shop(article_num=f'A{i:03d}', user_id=2, title=f'Товар {i % 4}',
+                            description='Описание', price=(i % 3) * 100, quantity=i % 2,
+                            link_img='/img/products/x.png', category='Запчасти'))
+    db.session.commit()
+    return [p.id for p in Shop.query.all()]
+
+
+@pytest.mark.parametrize('sort', sorted(SORT_MAPPING))
+def test_cursor_walks_every_page_once(app, products, sort):
+    client = app.test_client()
+    expected = [item['id'] for item in client.get(f'/api/products?sort={sort}&all=1').get_json()['items']]
+
+    seen, cursor = [], ''
+    for _ in range(len(products)):
+        data = client.get('/api/products', query_string={'sort': sort, 'per_page': 5, 'cursor': cursor}).get_json()
+        seen.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert seen == expected
+    assert sorted(seen) == sorted(products)
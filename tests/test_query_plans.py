@@ -0,0 +1,26 @@
+# Регрессионная проверка планов частых запросов (flask check-query-plans).
+
+from commands import FULL_SCAN_RE, explain_hot_queries
+
+
+def test_hot_queries_use_indexes(app):
+    plans = explain_hot_queries(500)
+    assert {name for name, _, _ in plans} >= {'get_all_products: по умолчанию', 'get_all_products: q, relevance'}
+    assert [(name, full_scans) for name, _, full_scans in plans if full_scans] == []
+
+
+def test_search_query_joins_fts_index(app):
+    plans = {name: plan for name, plan, _ in explain_hot_queries(500)}
+    assert any('shop_fts' in line for line in plans['get_all_products: q, relevance'])
+
+
+def test_full_scan_is_detected():
+    assert FULL_SCAN_RE.match('SCAN shop')
+    assert FULL_SCAN_RE.match('SCAN TABLE shop')
+    assert not FULL_SCAN_RE.match('SCAN shop USING INDEX ix_shop_created_at_id')
+
+
+def test_cli_command(app):
+    result = app.test_cli_runner().invoke(args=['check-query-plans', '--rows', '500'])
+    assert result.exit_code == 0, result.output
+    assert 'FULL SCAN' not in result.output
@@ -0,0 +1,29 @@
+# Поиск товаров без поискового индекса (запасной ILIKE) и фильтр title.
+
+import pytest
+from extensions import db
+from models import Shop
+
+
+@pytest.fixture
+def products(app):
+    for i, (title, category) in enumerate((('Шины летние', 'Шины'), ('Диск литой', 'Диски'),
+                                           ('Колпак', 'Шины'))):
+        db.session.add(Shop(article_num=f'S{i:03d}', user_id=2, title=title, description='Описание',
+                            price=100, quantity=1, link_img='/img/products/x.png', category=category))
+    db.session.commit()
+
+
+def _titles(client, **params):
+    response = client.get('/api/products', query_string={'all': 1, **params})
+    assert response.status_code == 200
+    return sorted(item['title'] for item in response.get_json()['items'])
+
+
+def test_fallback_search_keeps_cyrillic_case(app, products):
+    # Без индекса ILIKE в SQLite не сворачивает регистр кириллицы: слово ищется как введено
+    assert _titles(app.test_client(), q='Шины') == ['Колпак', 'Шины летние']
+
+
+def test_title_is_substring_of_title_only(app, products):
+    assert _titles(app.test_client(), title='ины') == ['Шины летние']
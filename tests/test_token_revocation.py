@@ -0,0 +1,19 @@
+# Кэш проверки отзыва токенов: отзыв, сделанный в другом процессе.
+
+import time
+from extensions import db
+from models import UserToken
+from utils.token_revocation import seen_tokens
+
+
+def test_revocation_from_other_worker_seen_after_cache_ttl(login, monkeypatch):
+    monkeypatch.setattr(seen_tokens, 'ttl', 0.2)
+    client = login('seller')
+    assert client.get('/auth').status_code == 200
+
+    # Другой воркер отзывает токен: в БД отметка есть, в кэше этого процесса — нет
+    UserToken.query.update({UserToken.revoked: True})
+    db.session.commit()
+    time.sleep(0.3)
+
+    assert client.get('/auth').status_code == 401
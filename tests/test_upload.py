@@ -0,0 +1,37 @@
+# Сохранение изображений товаров: повторная загрузка того же файла.
+
+import io
+import os
+import time
+from werkzeug.datastructures import FileStorage
+from utils.add_img import save_product_image, delete_image_files
+
+
+def test_duplicate_upload_refreshes_mtime(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    content = b'\x89PNG\r\n\x1a\n' + b'0' * 64
+
+    save_product_image(FileStorage(io.BytesIO(content), filename='a.png'))
+    path, = tmp_path.iterdir()
+    old = time.time() - 7 * 24 * 3600
+    os.utime(path, (old, old))
+
+    save_product_image(FileStorage(io.BytesIO(content), filename='b.png'))
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+    # Старый файл не должен выглядеть ненужным для сборщика изображений
+    assert path.stat().st_mtime > old + 3600
+
+
+def test_inline_delete_keeps_recent_files(tmp_path):
+    products = tmp_path / 'img' / 'products'
+    products.mkdir(parents=True)
+    fresh, old = products / 'fresh.png', products / 'old.png'
+    for path in (fresh, old, products / 'old-320w.webp'):
+        path.write_bytes(b'x')
+    stale = time.time() - 7 * 24 * 3600
+    os.utime(old, (stale, stale))
+
+    # Свежий файл мог только что переиспользовать загрузка, товар которой ещё не сохранён
+    deleted = delete_image_files(str(tmp_path), ['/img/products/fresh.png', '/img/products/old.png'], 3600)
+    assert deleted == 2
+    assert sorted(p.name for p in products.iterdir()) == ['fresh.png']
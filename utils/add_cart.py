@@ -1,9 +1,11 @@
 # Корзина покупателя.
 # Функции для добавления товаров в корзину, просмотр содержимого корзины и оформление покупки (перевод товаров из корзины в статус «куплено»).
 
-from models import  CartItem, Shop
+from sqlalchemy.orm import joinedload
+from models import  CartItem
 from extensions import db
 from utils.time import current_time
+from utils.catalog_cache import bump_catalog_version
 
 def add_to_cart(user_id, product_id, quantity=1):
     """
@@ -38,7 +40,8 @@ def purchase_cart_items(user_id):
     """
     Помечает товары в корзине как купленные и уменьшает остаток на складе (Shop.quantity).
     """
-    cart_items = CartItem.query.filter_by(user_id=user_id, is_purchased=False).all()
+    cart_items = CartItem.query.options(joinedload(CartItem.product)) \
+        .filter_by(user_id=user_id, is_purchased=False).all()
     
     for item in cart_items:
         # Уменьшаем остаток на складе
@@ -53,6 +56,7 @@ def purchase_cart_items(user_id):
         item.purchased_at = current_time()
 
     db.session.commit()
+    bump_catalog_version()
 
 def validate_cart_for_checkout(user_id):
     """
@@ -64,11 +68,13 @@ def validate_cart_for_checkout(user_id):
     Возвращает:
         (errors: list[str], cart_items: list[CartItem])
     """
-    cart_items = CartItem.query.filter_by(user_id=user_id, is_purchased=False).all()
+    # Товары загружаются тем же запросом, что и корзина
+    cart_items = CartItem.query.options(joinedload(CartItem.product)) \
+        .filter_by(user_id=user_id, is_purchased=False).all()
     errors = []
 
     for item in cart_items:
-        product = Shop.query.get(item.product_id)
+        product = item.product
         if not product:
             errors.append(f"Товар с ID {item.product_id} удалён из каталога.")
             continue
@@ -1,15 +1,29 @@
 # Добавление файла с изображением товара.
+# Файлы хранятся под хэшем содержимого: одинаковые загрузки дают один файл,
+# а имя файла никогда не меняет содержимое — его можно кэшировать навсегда.
+# Файл общий для всех товаров, которые на него ссылаются, поэтому удалять его
+# можно только когда ссылок не осталось (см. referenced_images).
 
+import hashlib
 import os
-from werkzeug.utils import secure_filename
-
-import uuid
-
-import os
+import logging
+import tempfile
+import time
 from pathlib import Path
 from werkzeug.utils import secure_filename
-import uuid
 from flask import current_app
+from extensions import db
+from models import Shop
+
+
+# Изображение-заглушка для товаров без собственного фото
+DEFAULT_PRODUCT_IMAGE = "/img/avatars/default_product.png"
+
+# Длина имени файла из хэша содержимого (sha256, 160 бит)
+CONTENT_HASH_LENGTH = 40
+
+# Размер порции чтения загружаемого файла
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 def save_product_image(image_file):
@@ -19,23 +33,16 @@ def save_product_image(image_file):
     - ALLOWED_EXTENSIONS
     - MAX_CONTENT_LENGTH
 
-    Возвращает URL-путь /static/img/products/новое_имя_файла
+    Файл читается один раз: содержимое пишется во временный файл, одновременно
+    считаются хэш и размер. Имя файла — хэш содержимого; если такой файл уже
+    есть, возвращается ссылка на него.
+
+    Возвращает URL-путь /img/products/<хэш>.<расширение>
     """
     upload_folder = current_app.config['UPLOAD_FOLDER']
     allowed_extensions = current_app.config['ALLOWED_EXTENSIONS']
     max_file_size = current_app.config['MAX_CONTENT_LENGTH']
 
-    # --- Проверка размера файла ---
-    # image_file — это FileStorage, он не имеет .seek() по умолчанию в multipart/form-data,
-    # поэтому используем .read(), но потом нужно вернуть указатель в начало.
-    image_file.stream.seek(0, os.SEEK_END)
-    file_size = image_file.stream.tell()
-    image_file.stream.seek(0)  # возвращаем в начало для последующего save()
-
-    if file_size > max_file_size:
-        max_mb = max_file_size / (1024 * 1024)
-        raise ValueError(f"Размер файла превышает допустимый лимит ({max_mb:.1f} МБ)")
-
     # --- Безопасное имя файла ---
     filename = secure_filename(image_file.filename)
     if '.' not in filename:
@@ -45,12 +52,37 @@ def save_product_image(image_file):
     if ext not in allowed_extensions:
         raise ValueError(f"Недопустимый формат файла. Допустимые: {', '.join(allowed_extensions)}")
 
-    # --- Создание папки и сохранение ---
+    # --- Запись во временный файл с подсчётом хэша и размера ---
     os.makedirs(upload_folder, exist_ok=True)
 
-    unique_filename = f"{uuid.uuid4().hex}.{ext}"
-    file_path = os.path.join(upload_folder, unique_filename)
-    image_file.save(file_path)
+    digest = hashlib.sha256()
+    file_size = 0
+    # Временный файл — в той же папке, чтобы переименование было атомарным
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while chunk := image_file.stream.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_file_size:
+                    max_mb = max_file_size / (1024 * 1024)
+                    raise ValueError(f"Размер файла превышает допустимый лимит ({max_mb:.1f} МБ)")
+                digest.update(chunk)
+                tmp.write(chunk)
+
+        unique_filename = f"{digest.hexdigest()[:CONTENT_HASH_LENGTH]}.{ext}"
+        file_path = os.path.join(upload_folder, unique_filename)
+        try:
+            # Такое изображение уже загружено — используем существующий файл.
+            # Время изменения обновляется, чтобы сборщик неиспользуемых изображений
+            # (IMAGE_GC_GRACE) не удалил его до сохранения товара со ссылкой
+            os.utime(file_path)
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
     # --- Формирование URL-пути (относительно корня static/) ---
     static_abs = Path(current_app.static_folder).resolve()
@@ -62,4 +94,78 @@ def save_product_image(image_file):
     except ValueError:
         # fallback: если UPLOAD_FOLDER не внутри static/
         # (маловероятно, но на всякий случай)
-        return f"/{unique_filename}"
\ No newline at end of file
+        return f"/{unique_filename}"
+
+
+def referenced_images(links):
+    """
+    Возвращает те из ссылок links, на которые ещё ссылается хотя бы один товар.
+    Остальные файлы можно удалять: изображение с хэш-именем может быть общим
+    для нескольких товаров.
+    """
+    links = {link for link in links if link}
+    if not links:
+        return set()
+    return {
+        link for (link,) in db.session.query(Shop.link_img).filter(Shop.link_img.in_(links)).distinct()
+    }
+
+
+def resolve_image_reference(link_img):
+    """
+    Проверяет ссылку на уже загруженное изображение (например, при импорте товаров):
+    путь должен вести к существующему файлу внутри static/ с допустимым расширением.
+
+    Возвращает нормализованный путь вида /img/products/имя_файла.
+    """
+    allowed_extensions = current_app.config['ALLOWED_EXTENSIONS']
+    link_img = link_img.strip()
+    if link_img.startswith('/static/'):
+        link_img = link_img[len('/static'):]
+
+    ext = link_img.rsplit('.', 1)[-1].lower() if '.' in link_img else ''
+    if ext not in allowed_extensions:
+        raise ValueError(f"Недопустимый формат файла. Допустимые: {', '.join(allowed_extensions)}")
+
+    static_abs = Path(current_app.static_folder).resolve()
+    file_abs = (static_abs / link_img.lstrip('/')).resolve()
+    if static_abs not in file_abs.parents or not file_abs.is_file():
+        raise ValueError(f"Изображение не найдено: {link_img}")
+
+    return f"/{file_abs.relative_to(static_abs).as_posix()}"
+
+
+def delete_image_files(static_folder, links, grace_seconds=0):
+    """
+    Удаляет файлы изображений по их URL-путям относительно static/
+    вместе с уменьшенными копиями (<имя>-<ширина>w.<формат>).
+    Не требует контекста приложения, поэтому подходит для фонового выполнения.
+
+    Файлы моложе grace_seconds не удаляются: проверка ссылок (referenced_images)
+    не атомарна с загрузкой, а повторная загрузка того же содержимого обновляет
+    время изменения файла до сохранения товара. Такие файлы удалит сборщик
+    неиспользуемых изображений (flask gc-images), если ссылка так и не появится.
+    Возвращает количество удалённых файлов.
+    """
+    static_abs = Path(static_folder).resolve()
+    deadline = time.time() - grace_seconds
+    deleted = 0
+    for link in links:
+        if not link or link == DEFAULT_PRODUCT_IMAGE:
+            continue
+        full_path = (static_abs / link.lstrip('/')).resolve()
+        if static_abs not in full_path.parents:
+            continue
+        try:
+            if full_path.stat().st_mtime > deadline:
+                continue
+        except FileNotFoundError:
+            pass
+        for path in [full_path, *full_path.parent.glob(f"{full_path.stem}-*w.*")]:
+            try:
+                if path.is_file():
+                    os.remove(path)
+                    deleted += 1
+            except OSError as e:
+                logging.warning(f"Не удалось удалить файл изображения {path}: {e}")
+    return deleted
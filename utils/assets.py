@@ -0,0 +1,138 @@
+# Статические ресурсы (CSS/JS) с хэшем содержимого в имени и заранее сжатыми копиями.
+#
+# Команда `flask build-assets` создаёт рядом с каждым файлом копию <имя>.<хэш>.<расш>,
+# её .gz и (при установленном brotli) .br, и записывает манифест исходное имя -> имя с хэшем.
+# url_for('static', ...) выдаёт имена из манифеста; такие файлы кэшируются навсегда,
+# а клиенту отдаётся сжатая копия по Accept-Encoding. Без манифеста всё работает
+# как раньше — с исходными именами.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from pathlib import Path
+from flask import g, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Папки static/, файлы которых получают хэш в имени
+ASSET_DIRS = ('css', 'js')
+ASSET_EXTENSIONS = ('.css', '.js')
+
+# Манифест сборки (относительно static/)
+MANIFEST_NAME = 'assets-manifest.json'
+
+# Длина хэша в имени файла
+ASSET_HASH_LENGTH = 12
+
+# Имя, уже содержащее хэш (результат предыдущей сборки)
+FINGERPRINTED_RE = re.compile(r'\.[0-9a-f]{%d}\.\w+$' % ASSET_HASH_LENGTH)
+
+# Сжатые копии в порядке предпочтения: кодировка -> суффикс файла
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write_if_changed(path, data):
+    if not path.exists() or path.read_bytes() != data:
+        path.write_bytes(data)
+
+
+def build_assets(static_folder):
+    """
+    Создаёт копии ресурсов с хэшем в имени и их сжатые варианты, удаляет
+    копии прежних сборок и записывает манифест. Возвращает манифест.
+    """
+    static_abs = Path(static_folder)
+    manifest = {}
+
+    for folder in ASSET_DIRS:
+        for path in sorted((static_abs / folder).rglob('*')):
+            if not path.is_file():
+                continue
+            if FINGERPRINTED_RE.search(path.name) or path.name.endswith(('.gz', '.br')):
+                # Копии прежних сборок пересоздаются заново
+                path.unlink()
+                continue
+            if path.suffix not in ASSET_EXTENSIONS:
+                continue
+
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()[:ASSET_HASH_LENGTH]
+            hashed = path.with_name(f"{path.stem}.{digest}{path.suffix}")
+            _write_if_changed(hashed, data)
+            # mtime=0 — одинаковое содержимое даёт одинаковый .gz
+            _write_if_changed(hashed.with_name(hashed.name + '.gz'), gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_if_changed(hashed.with_name(hashed.name + '.br'), brotli.compress(data))
+
+            manifest[path.relative_to(static_abs).as_posix()] = hashed.relative_to(static_abs).as_posix()
+
+    (static_abs / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Читает манифест сборки; если сборки не было — пустой словарь."""
+    try:
+        with open(os.path.join(static_folder, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def preload_asset(filename, as_='style'):
+    """
+    Функция шаблонов: возвращает URL ресурса и добавляет к ответу заголовок
+    Link: <url>; rel=preload, чтобы браузер начал загрузку до разбора HTML.
+    """
+    url = url_for('static', filename=filename)
+    g.setdefault('preload_links', []).append(f"<{url}>; rel=preload; as={as_}")
+    return url
+
+
+def init_assets(app):
+    """Подключает манифест ресурсов: url_for, выдачу сжатых копий и заголовки preload."""
+    manifest = load_manifest(app.static_folder)
+    fingerprinted = set(manifest.values())
+    app.add_template_global(preload_asset)
+
+    @app.after_request
+    def add_preload_links(response):
+        links = g.pop('preload_links', None)
+        if links and response.mimetype == 'text/html':
+            response.headers.add('Link', ', '.join(links))
+        return response
+
+    if not manifest:
+        return
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    static_view = app.view_functions['static']
+
+    def static_precompressed(filename):
+        """Отдаёт .br/.gz-копию ресурса с хэшем, если клиент её принимает."""
+        if filename not in fingerprinted:
+            return static_view(filename=filename)
+
+        mimetype = mimetypes.guess_type(filename)[0]
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding in request.accept_encodings and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+                response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = static_view(filename=filename)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = static_precompressed
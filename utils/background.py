@@ -0,0 +1,26 @@
+# Фоновое выполнение задач вне потока запроса (удаление файлов, обслуживание).
+
+import atexit
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+sys_logger = logging.getLogger('app.system')
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='background')
+atexit.register(_executor.shutdown, wait=True)
+
+
+def _run(fn, args, kwargs):
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        sys_logger.exception(f"Ошибка фоновой задачи {getattr(fn, '__name__', fn)}")
+
+
+def run_in_background(fn, *args, **kwargs):
+    """
+    Ставит задачу в очередь фонового пула потоков.
+    Контекст приложения в задаче недоступен — всё нужное передаётся аргументами.
+    """
+    return _executor.submit(_run, fn, args, kwargs)
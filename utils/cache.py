@@ -0,0 +1,58 @@
+# Простой потокобезопасный кэш в памяти процесса: ограниченный размер (LRU) и время жизни записей (TTL).
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Кэш «ключ → значение» с вытеснением давно не использованных записей
+    и ограничением времени жизни.
+
+    :param maxsize: максимальное количество записей
+    :param ttl: время жизни записи в секундах (None — без ограничения)
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Возвращает значение по ключу или default, если записи нет или она устарела."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Сохраняет значение; при переполнении удаляет самую давнюю запись."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Удаляет запись и возвращает её значение."""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,95 @@
+# Кэш ответов каталога товаров.
+# Версия каталога увеличивается после каждой записи в товары (добавление, изменение,
+# удаление, оформление заказа); ключи кэша включают версию, поэтому после записи
+# устаревшие ответы больше не выдаются.
+#
+# Кэш и версия живут в памяти процесса. При нескольких воркерах запись, сделанная
+# в одном из них, до остальных доходит по истечении TTL (CATALOG_CACHE_TTL);
+# ETag списков по той же причине меняется раз в CATALOG_CACHE_TTL.
+
+import threading
+import time
+import uuid
+from functools import wraps
+from flask import current_app, request
+from utils.cache import LRUCache
+
+
+listing_cache = LRUCache(maxsize=256, ttl=30)
+
+# Оценки количества товаров по фильтрам (count=estimate). Не зависят от версии
+# каталога и не сбрасываются при записи — устаревают только по TTL
+count_cache = LRUCache(maxsize=1024, ttl=300)
+
+_version = 0
+# Идентификатор процесса в ревизии: у разных воркеров ревизии не совпадают,
+# даже если их счётчики версий случайно равны
+_boot_id = uuid.uuid4().hex[:8]
+_version_lock = threading.Lock()
+
+
+def init_catalog_cache(app):
+    """Применяет настройки кэша из конфигурации приложения."""
+    listing_cache.maxsize = app.config.get('CATALOG_CACHE_SIZE', 256)
+    listing_cache.ttl = app.config.get('CATALOG_CACHE_TTL', 30)
+    count_cache.ttl = app.config.get('COUNT_ESTIMATE_TTL', 300)
+
+
+def get_catalog_version():
+    return _version
+
+
+def get_catalog_revision():
+    """
+    Ревизия каталога для ETag списков: уникальна в пределах процесса и версии.
+    Включает номер интервала длиной CATALOG_CACHE_TTL: запись, сделанная в другом
+    воркере, не меняет здешнюю версию, и без интервала ETag оставался бы прежним
+    бесконечно. Так клиент получает свежие данные не позже, чем истекает кэш.
+    """
+    bucket = int(time.time() // max(listing_cache.ttl or 1, 1))
+    return f"{_boot_id}:{_version}:{bucket}"
+
+
+def bump_catalog_version():
+    """Отмечает изменение каталога: все закэшированные ответы становятся недействительными."""
+    global _version
+    with _version_lock:
+        _version += 1
+    listing_cache.clear()
+
+
+def normalize_args(args):
+    """
+    Приводит параметры запроса к каноническому виду для ключа кэша:
+    параметры отсортированы по имени, список категорий очищен от пустых
+    значений и дублей и отсортирован.
+    """
+    normalized = []
+    for key in sorted(args.keys()):
+        values = args.getlist(key)
+        if key == 'category':
+            values = sorted({v.strip() for v in values if v.strip()})
+            if not values:
+                continue
+        normalized.append((key, tuple(values)))
+    return tuple(normalized)
+
+
+def cached_catalog_response(view):
+    """
+    Декоратор для GET-маршрутов каталога: кэширует успешные JSON-ответы
+    по нормализованной строке запроса и текущей версии каталога.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, get_catalog_version(), normalize_args(request.args))
+        body = listing_cache.get(key)
+        if body is not None:
+            return current_app.response_class(body, mimetype='application/json')
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == 'application/json' and not response.is_streamed:
+            listing_cache.set(key, response.get_data())
+        return response
+
+    return wrapper
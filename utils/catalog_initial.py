@@ -0,0 +1,51 @@
+# Первая страница каталога и фасеты для встраивания в index.html.
+# Витрина получает товары вместе с HTML и не делает отдельный запрос
+# к /api/products при загрузке. Данные берутся из кэша каталога и
+# пересчитываются после записи в товары (смена версии каталога).
+
+from werkzeug.datastructures import MultiDict
+from extensions import db
+from models import Shop
+from utils.catalog_cache import listing_cache, get_catalog_version
+from utils.pagination import keyset_order
+from utils.product_facets import compute_facets
+from utils.product_serializer import parse_fields, product_select, serialize_rows
+
+
+# Параметры, с которыми сетка товаров (filters_category.js) запрашивает страницу.
+# Должны совпадать со скриптом: встроенный ответ равен ответу /api/products
+INITIAL_PAGE_ARGS = MultiDict([
+    ('fields', 'id,article_num,title,description,price,img_url,img_srcset,sale'),
+    ('description_preview', '101'),
+    ('per_page', '100'),
+    ('count', 'none'),
+])
+
+
+def initial_catalog_payload():
+    """
+    Возвращает {'products': <ответ /api/products для первой страницы>, 'facets': <фасеты>}
+    для всего каталога без фильтров, с сортировкой по умолчанию (новые сверху).
+    """
+    key = ('catalog_initial', get_catalog_version())
+    payload = listing_cache.get(key)
+    if payload is not None:
+        return payload
+
+    fields, preview = parse_fields(INITIAL_PAGE_ARGS)
+    per_page = INITIAL_PAGE_ARGS.get('per_page', type=int)
+    query = product_select(fields, preview).order_by(*keyset_order(Shop.created_at, Shop.id, True))
+    rows = db.session.execute(query.limit(per_page + 1)).all()
+
+    payload = {
+        'products': {
+            'items': serialize_rows(rows[:per_page], fields),
+            'current_page': 1,
+            'per_page': per_page,
+            'has_next': len(rows) > per_page,
+            'count': INITIAL_PAGE_ARGS['count'],
+        },
+        'facets': compute_facets(MultiDict()),
+    }
+    listing_cache.set(key, payload)
+    return payload
@@ -0,0 +1,141 @@
+# Сжатие ответов приложения (gzip / brotli) по заголовку Accept-Encoding.
+# Сжимаются только текстовые типы (JSON, HTML, текст, CSV, NDJSON) больше
+# COMPRESS_MIN_SIZE байт; потоковые ответы сжимаются по частям, без буферизации.
+# Файлы static/ (в том числе заранее сжатые копии) отдаются как есть.
+#
+# Статистика экономии по маршрутам хранится в памяти процесса
+# и доступна администратору (GET /admin/api/compression-stats).
+
+import threading
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Типы ответов, которые имеет смысл сжимать; изображения, архивы и т.п. уже сжаты
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript',
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'image/svg+xml',
+}
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(endpoint, bytes_in, bytes_out, responses=0):
+    with _stats_lock:
+        item = _stats.setdefault(endpoint, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0})
+        item['responses'] += responses
+        item['bytes_in'] += bytes_in
+        item['bytes_out'] += bytes_out
+
+
+def compression_stats():
+    """Экономия по маршрутам: ответы, байты до/после сжатия, сэкономлено байт и доля."""
+    with _stats_lock:
+        snapshot = {endpoint: dict(item) for endpoint, item in _stats.items()}
+    for item in snapshot.values():
+        item['bytes_saved'] = item['bytes_in'] - item['bytes_out']
+        item['ratio'] = round(item['bytes_out'] / item['bytes_in'], 3) if item['bytes_in'] else None
+    return dict(sorted(snapshot.items(), key=lambda kv: -kv[1]['bytes_saved']))
+
+
+def _compressor(encoding, level):
+    """
+    Потоковый компрессор для кодировки: функции (сжать часть, сбросить буфер, завершить).
+    Сброс после каждой части позволяет клиенту разбирать поток, не дожидаясь конца.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        return compressor.process, compressor.flush, compressor.finish
+    # wbits=31 — формат gzip
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def _choose_encoding():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _weaken_etag(response):
+    # Сжатое представление отличается побайтно от исходного — ETag становится слабым
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _compress_stream(chunks, encoding, level, endpoint):
+    """Сжимает поток по частям; каждая часть сразу отправляется клиенту."""
+    compress, flush, finish = _compressor(encoding, level)
+    bytes_in = bytes_out = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            data = compress(chunk) + flush()
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            yield data
+        tail = finish()
+        bytes_out += len(tail)
+        yield tail
+    finally:
+        _record(endpoint, bytes_in, bytes_out, responses=1)
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def init_compression(app):
+    """
+    Регистрирует сжатие ответов. Должно регистрироваться раньше остальных
+    after_request-обработчиков приложения, чтобы выполняться последним.
+    """
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+        if response.status_code == 304:
+            # ETag в 304 должен совпадать с ETag сжатого ответа 200
+            if _choose_encoding() is not None:
+                _weaken_etag(response)
+            return response
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or request.method == 'HEAD'
+        ):
+            return response
+
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+        endpoint = request.endpoint or 'unknown'
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding, level, endpoint)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            compress, _, finish = _compressor(encoding, level)
+            data = compress(body) + finish()
+            _record(endpoint, len(body), len(data), responses=1)
+            response.set_data(data)
+
+        response.headers['Content-Encoding'] = encoding
+        _weaken_etag(response)
+        return response
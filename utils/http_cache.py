@@ -0,0 +1,65 @@
+# Условные HTTP-запросы: ETag / If-None-Match и Last-Modified / If-Modified-Since.
+# Если данные у клиента не изменились, отвечаем 304 без тела и без сериализации.
+
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import current_app, request
+from utils.catalog_cache import get_catalog_revision, normalize_args
+
+
+def make_etag(*parts):
+    """Строит сильный ETag из частей ревизии (строки, числа, даты, кортежи)."""
+    raw = '|'.join(repr(p) for p in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _as_utc(dt):
+    # SQLite возвращает даты без часового пояса; в БД они хранятся в UTC
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+    Проверяет условные заголовки запроса.
+    If-None-Match имеет приоритет над If-Modified-Since (RFC 9110).
+    ETag сравнивается слабо: сжатые ответы возвращаются клиенту со слабым ETag.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return _as_utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified=None):
+    """Добавляет к ответу ETag, Last-Modified и требование перепроверки кэша клиентом."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    response = current_app.response_class(status=304)
+    return set_validators(response, etag, last_modified)
+
+
+def catalog_etag(view):
+    """
+    Декоратор для списков каталога: ETag зависит от ревизии каталога и
+    нормализованных параметров запроса, поэтому 304 отдаётся до обращения к БД.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = make_etag(request.endpoint, get_catalog_revision(), normalize_args(request.args))
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            set_validators(response, etag)
+        return response
+
+    return wrapper
@@ -0,0 +1,156 @@
+# Сборка мусора в папке изображений товаров.
+# Удаляет файлы, на которые не ссылается ни один товар (замена фото, удаление
+# товаров каскадом или правкой БД напрямую, недокачанные загрузки).
+#
+# Папка читается потоково (os.scandir), ссылки проверяются порциями одним
+# запросом IN на порцию, а судьба уменьшенных копий решается сразу — по наличию
+# файла оригинала, — поэтому память не зависит от числа файлов.
+# Удаляются только файлы старше периода ожидания: загрузка, товар для
+# которой ещё не сохранён, не будет удалена.
+
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from flask import current_app
+from extensions import db
+from models import Shop
+from utils.image_variants import variant_filename
+
+
+sys_logger = logging.getLogger('app.system')
+
+# Уменьшенная копия: <имя оригинала>-<ширина>w.<формат>
+VARIANT_RE = re.compile(r'^(?P<stem>.+)-\d+w\.\w+$')
+
+# Временный файл незавершённой загрузки (save_product_image)
+UPLOAD_TMP_SUFFIX = '.upload'
+
+
+def _remove(path, size, report, dry_run):
+    if not dry_run:
+        try:
+            os.remove(path)
+        except OSError as e:
+            sys_logger.warning(f"Не удалось удалить файл изображения {path}: {e}")
+            return
+    report['files'] += 1
+    report['bytes'] += size
+
+
+def _variant_paths(folder, stem):
+    """Пути уменьшенных копий оригинала для текущих IMAGE_VARIANT_WIDTHS / FORMATS."""
+    config = current_app.config
+    return [
+        os.path.join(folder, variant_filename(stem, width, fmt))
+        for width in config.get('IMAGE_VARIANT_WIDTHS', (320, 640, 1024))
+        for fmt in config.get('IMAGE_VARIANT_FORMATS', ('webp', 'jpeg'))
+    ]
+
+
+def _has_original(folder, stem):
+    extensions = current_app.config.get('ALLOWED_EXTENSIONS', ())
+    return any(os.path.exists(os.path.join(folder, f"{stem}.{ext}")) for ext in extensions)
+
+
+def _sweep_originals(batch, folder, url_prefix, report, dry_run):
+    """Удаляет оригиналы из порции [(путь, имя, размер)], на которые нет ссылок, вместе с копиями."""
+    links = {f"{url_prefix}/{name}": (path, name, size) for path, name, size in batch}
+    referenced = {
+        link for (link,) in db.session.query(Shop.link_img).filter(Shop.link_img.in_(links)).distinct()
+    }
+    for link, (path, name, size) in links.items():
+        if link in referenced:
+            continue
+        _remove(path, size, report, dry_run)
+        for variant in _variant_paths(folder, name.rsplit('.', 1)[0]):
+            try:
+                variant_size = os.path.getsize(variant)
+            except OSError:
+                continue
+            _remove(variant, variant_size, report, dry_run)
+
+
+def collect_orphan_images(static_folder, upload_folder, grace_seconds, batch_size=500, dry_run=False):
+    """
+    Удаляет из upload_folder файлы без ссылок из Shop.link_img, старше grace_seconds.
+    Уменьшенные копии удаляются вместе с оригиналом или если оригинала уже нет
+    (копии прежних ширин и форматов — при следующем запуске после оригинала).
+    dry_run — только посчитать, ничего не удаляя. Требует контекст приложения.
+
+    Возвращает отчёт {'scanned': N, 'files': N, 'bytes': N}.
+    """
+    report = {'scanned': 0, 'files': 0, 'bytes': 0}
+    upload_abs = Path(upload_folder).resolve()
+    if not upload_abs.is_dir():
+        return report
+    url_prefix = '/' + upload_abs.relative_to(Path(static_folder).resolve()).as_posix()
+    deadline = time.time() - grace_seconds
+
+    batch = []
+    with os.scandir(upload_abs) as entries:
+        for entry in entries:
+            # Служебные файлы (.gitkeep) не трогаем
+            if not entry.is_file() or entry.name.startswith('.'):
+                continue
+            report['scanned'] += 1
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Копия уже удалена вместе со своим оригиналом
+                continue
+            if stat.st_mtime > deadline:
+                continue
+
+            match = VARIANT_RE.match(entry.name)
+            if entry.name.endswith(UPLOAD_TMP_SUFFIX):
+                _remove(entry.path, stat.st_size, report, dry_run)
+            elif match:
+                # Копии оригиналов без ссылок удаляются вместе с ними; здесь — копии без оригинала
+                if not _has_original(upload_abs, match.group('stem')):
+                    _remove(entry.path, stat.st_size, report, dry_run)
+            else:
+                batch.append((entry.path, entry.name, stat.st_size))
+                if len(batch) >= batch_size:
+                    _sweep_originals(batch, upload_abs, url_prefix, report, dry_run)
+                    batch = []
+    if batch:
+        _sweep_originals(batch, upload_abs, url_prefix, report, dry_run)
+
+    return report
+
+
+def start_image_gc(app):
+    """
+    Запускает периодическую сборку мусора в фоновом потоке
+    (каждые IMAGE_GC_INTERVAL секунд; 0 — не запускать).
+    Вызывается только процессом встроенного сервера: в каждом воркере или
+    CLI-команде поток сканировал бы папку изображений независимо. При нескольких
+    воркерах вместо потока используется flask gc-images по расписанию (cron).
+    """
+    interval = app.config.get('IMAGE_GC_INTERVAL', 0)
+    if not interval:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    report = collect_orphan_images(
+                        app.static_folder,
+                        app.config['UPLOAD_FOLDER'],
+                        app.config.get('IMAGE_GC_GRACE', 24 * 3600),
+                    )
+                sys_logger.info(
+                    f"Сборка мусора изображений: удалено {report['files']} файлов, "
+                    f"освобождено {report['bytes']} байт"
+                )
+            except Exception:
+                sys_logger.exception("Ошибка сборки мусора изображений")
+
+    thread = threading.Thread(target=loop, name='image-gc', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,150 @@
+# Уменьшенные копии изображений товаров (JPEG и WebP нескольких ширин) для srcset.
+# Копии создаются в пуле процессов после сохранения товара, поток запроса их не ждёт.
+# Файлы копий лежат рядом с оригиналом: <имя>-<ширина>w.<формат>, список копий
+# записывается в Shop.image_variants. Товары с одинаковым файлом (хэш содержимого)
+# используют одни и те же копии.
+#
+# Для обработки нужен Pillow. Если он не установлен, копии не создаются
+# и витрина продолжает показывать оригиналы.
+
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from flask import current_app
+from extensions import db
+from models import Shop
+from utils.background import run_in_background
+from utils.catalog_cache import bump_catalog_version
+from utils.page_cache import evict_product_pages
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+
+sys_logger = logging.getLogger('app.system')
+
+# Расширение файла для формата копии
+VARIANT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def variant_filename(stem, width, fmt):
+    """Имя файла копии: <имя оригинала>-<ширина>w.<расширение>."""
+    return f"{stem}-{width}w.{VARIANT_EXTENSIONS[fmt]}"
+
+
+def render_variants(source_path, widths, formats, quality):
+    """
+    Создаёт копии изображения source_path. Выполняется в отдельном процессе.
+    Копии шире оригинала не создаются — вместо них одна копия исходной ширины.
+
+    Возвращает список (ширина, формат, имя файла).
+    """
+    source = Path(source_path)
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    targets = sorted({min(w, image.width) for w in widths})
+    variants = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            frame = resized
+            if fmt == 'jpeg' and frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')
+            filename = variant_filename(source.stem, width, fmt)
+            frame.save(source.with_name(filename), fmt.upper(), quality=quality, optimize=True)
+            variants.append((width, fmt, filename))
+    return variants
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _store_variants(app, product_id, link_img, variants):
+    """Записывает список копий товару, если его изображение за это время не сменилось."""
+    folder = link_img.rsplit('/', 1)[0]
+    value = [
+        {'width': width, 'format': fmt, 'url': f"{folder}/{filename}"}
+        for width, fmt, filename in variants
+    ]
+    with app.app_context():
+        updated = db.session.execute(
+            db.update(Shop)
+            .where(Shop.id == product_id, Shop.link_img == link_img)
+            .values(image_variants=value),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        db.session.commit()
+    if updated:
+        # В ответах каталога и на странице товара появился srcset
+        bump_catalog_version()
+        evict_product_pages([product_id])
+
+
+def schedule_image_variants(product_id, link_img):
+    """
+    Ставит создание копий изображения товара в очередь пула процессов.
+    Вызывается после COMMIT; при отсутствии Pillow ничего не делает.
+    """
+    if Image is None or not link_img:
+        return
+
+    app = current_app._get_current_object()
+
+    # Файл с тем же содержимым уже обработан для другого товара — берём его копии
+    existing = db.session.execute(
+        db.select(Shop.image_variants)
+        .where(Shop.link_img == link_img, Shop.id != product_id, Shop.image_variants.is_not(None))
+        .limit(1)
+    ).scalar()
+    if existing:
+        variants = [(v['width'], v['format'], v['url'].rsplit('/', 1)[1]) for v in existing]
+        run_in_background(_store_variants, app, product_id, link_img, variants)
+        return
+
+    source_path = Path(app.static_folder) / link_img.lstrip('/')
+    future = _get_pool(app.config.get('IMAGE_WORKERS', 2)).submit(
+        render_variants,
+        str(source_path),
+        app.config.get('IMAGE_VARIANT_WIDTHS', (320, 640, 1024)),
+        app.config.get('IMAGE_VARIANT_FORMATS', ('webp', 'jpeg')),
+        app.config.get('IMAGE_VARIANT_QUALITY', 80),
+    )
+
+    def done(future):
+        error = future.exception()
+        if error is not None:
+            sys_logger.error(f"Ошибка создания копий изображения {link_img}: {error}")
+            return
+        # Запись в БД — в фоновом потоке, а не в служебном потоке пула процессов
+        run_in_background(_store_variants, app, product_id, link_img, future.result())
+
+    future.add_done_callback(done)
+
+
+def build_srcset(variants):
+    """
+    Строит значения srcset по списку копий: {'webp': '/static/... 320w, ...', 'jpeg': ...}.
+    Для товара без копий возвращает None.
+    """
+    if not variants:
+        return None
+    srcset = {}
+    for variant in sorted(variants, key=lambda v: v['width']):
+        srcset.setdefault(variant['format'], []).append(f"/static{variant['url']} {variant['width']}w")
+    return {fmt: ', '.join(items) for fmt, items in srcset.items()}
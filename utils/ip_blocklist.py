@@ -0,0 +1,129 @@
+# Таблица заблокированных IP-адресов в памяти процесса для проверки перед каждым запросом.
+#
+# Источник — записи IPAttemptLog с is_blocked=True. Запись содержит либо
+# отдельный адрес, либо подсеть в нотации CIDR (10.0.0.0/24, 2001:db8::/32).
+# Отдельные адреса хранятся в множестве, подсети — в множествах адресов сетей
+# по длине префикса: проверка адреса — несколько поисков в множествах, без SQL.
+#
+# Таблица перечитывается из БД при смене версии (блокировка/разблокировка
+# в этом процессе) и не реже раза в BLOCKED_IPS_TTL секунд — так изменения,
+# сделанные в других воркерах, доходят и сюда.
+
+import ipaddress
+import logging
+import threading
+import time
+from sqlalchemy.exc import SQLAlchemyError
+from models import IPAttemptLog
+
+
+sys_logger = logging.getLogger('app.system')
+
+_version = 0
+_version_lock = threading.Lock()
+
+
+def parse_block_entry(value):
+    """
+    Приводит адрес или подсеть к каноническому виду ('10.0.0.0/24', '192.168.1.5').
+    Бросает ValueError, если значение не является IP-адресом или подсетью.
+    """
+    value = str(value).strip()
+    if '/' in value:
+        # strict=False: 10.0.0.7/24 -> 10.0.0.0/24
+        return str(ipaddress.ip_network(value, strict=False))
+    return str(ipaddress.ip_address(value))
+
+
+class IPBlocklist:
+    """Множество заблокированных адресов и подсетей с быстрой проверкой принадлежности."""
+
+    def __init__(self):
+        self._exact = frozenset()
+        # (версия IP, длина префикса) -> множество адресов сетей (int)
+        self._networks = {}
+        self._loaded_version = None
+        self._loaded_at = 0.0
+        self._reload_lock = threading.Lock()
+
+    def build(self, entries):
+        """Строит таблицу по списку строк (адреса и подсети); некорректные строки пропускаются."""
+        exact = set()
+        networks = {}
+        for entry in entries:
+            try:
+                if '/' in entry:
+                    network = ipaddress.ip_network(entry, strict=False)
+                    key = (network.version, network.prefixlen)
+                    networks.setdefault(key, set()).add(int(network.network_address))
+                else:
+                    exact.add(ipaddress.ip_address(entry))
+            except ValueError:
+                sys_logger.warning(f"Некорректный заблокированный адрес в ip_attempt_log: {entry!r}")
+        # Ссылки заменяются целиком: читающие потоки видят либо старую, либо новую таблицу
+        self._exact = frozenset(exact)
+        self._networks = {key: frozenset(values) for key, values in networks.items()}
+
+    def contains(self, ip):
+        """Проверяет, заблокирован ли адрес ip (строка)."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        if address in self._exact:
+            return True
+        value = int(address)
+        max_bits = address.max_prefixlen
+        for (version, prefixlen), addresses in self._networks.items():
+            if version == address.version:
+                mask = ((1 << prefixlen) - 1) << (max_bits - prefixlen)
+                if value & mask in addresses:
+                    return True
+        return False
+
+    def reload(self):
+        """Перечитывает заблокированные адреса из БД. Требует контекст приложения."""
+        version = _version
+        entries = [ip for (ip,) in IPAttemptLog.query.with_entities(IPAttemptLog.ip_address)
+                   .filter(IPAttemptLog.is_blocked.is_(True))]
+        self.build(entries)
+        self._loaded_version = version
+        self._loaded_at = time.monotonic()
+
+    def ensure_fresh(self, ttl):
+        """Перечитывает таблицу, если сменилась версия или истёк ttl. Перечитывает один поток."""
+        if self._loaded_version == _version and time.monotonic() - self._loaded_at < ttl:
+            return
+        if not self._reload_lock.acquire(blocking=self._loaded_version is None):
+            # Перечитывание уже идёт в другом потоке — пока отвечаем по текущей таблице
+            return
+        try:
+            if self._loaded_version != _version or time.monotonic() - self._loaded_at >= ttl:
+                self.reload()
+        finally:
+            self._reload_lock.release()
+
+
+blocked_ips = IPBlocklist()
+
+
+def bump_blocklist_version():
+    """Отмечает изменение блокировок: таблица будет перечитана при следующем запросе."""
+    global _version
+    with _version_lock:
+        _version += 1
+
+
+def init_ip_blocklist(app):
+    """Загружает таблицу при запуске. Если таблиц ещё нет (до миграций) — загрузит первый запрос."""
+    with app.app_context():
+        try:
+            blocked_ips.reload()
+        except SQLAlchemyError as e:
+            sys_logger.warning(f"Не удалось загрузить заблокированные IP при запуске: {e}")
+
+
+def is_ip_blocked(ip, ttl=60):
+    """Проверяет адрес по таблице в памяти (при необходимости перечитав её из БД)."""
+    blocked_ips.ensure_fresh(ttl)
+    return blocked_ips.contains(ip)
@@ -0,0 +1,94 @@
+# Кэш отрендеренных HTML-страниц для гостей (главная и страницы товаров).
+# Для неавторизованного посетителя страница одинакова для всех, поэтому повторный
+# визит не обращается к БД и не рендерит шаблон.
+#
+# Страница товара вытесняется после COMMIT, изменившего или удалившего товар
+# (события ORM), а также явным вызовом evict_product_pages() после Core-запросов
+# (массовые операции, импорт, копии изображений). Кэш живёт в памяти процесса:
+# в остальных воркерах изменение проявится по истечении PAGE_CACHE_TTL.
+
+import threading
+import sqlalchemy as sa
+from flask import current_app, g, request
+from sqlalchemy.orm import Session
+from models import Shop
+from utils.cache import LRUCache
+
+
+page_cache = LRUCache(maxsize=512, ttl=300)
+
+# Счётчик вытеснений: страница, отрендеренная до вытеснения, в кэш не попадает
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def init_page_cache(app):
+    """Применяет настройки кэша страниц из конфигурации приложения."""
+    page_cache.maxsize = app.config.get('PAGE_CACHE_SIZE', 512)
+    page_cache.ttl = app.config.get('PAGE_CACHE_TTL', 300)
+
+
+def product_page_key(product_id):
+    return ('product', product_id)
+
+
+def evict_product_pages(product_ids):
+    """Удаляет из кэша страницы указанных товаров."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    for product_id in product_ids:
+        page_cache.pop(product_page_key(product_id))
+
+
+def guest_page(key, render):
+    """
+    Возвращает страницу гостя из кэша или рендерит её функцией render() и кэширует.
+    render() возвращает HTML или None (страницы нет — ответ не кэшируется, результат None).
+
+    В кэше хранится только тело и заголовки preload, без cookie. Кука access_token
+    (недействительный или отозванный токен) очищается, только если клиент её прислал.
+    """
+    cached = page_cache.get(key)
+    if cached is None:
+        generation = _generation
+        html = render()
+        if html is None:
+            return None
+        cached = (html, tuple(g.get('preload_links', ())))
+        if generation == _generation:
+            page_cache.set(key, cached)
+    else:
+        # Заголовок Link добавит after_request-хук init_assets, как при рендере
+        g.preload_links = list(cached[1])
+
+    response = current_app.make_response(cached[0])
+    if 'access_token' in request.cookies:
+        response.set_cookie('access_token', '', expires=0)
+    return response
+
+
+# Изменения копятся в session.info до COMMIT: после отката кэш не трогаем.
+
+def _pending(session):
+    return session.info.setdefault('page_cache_evict', set())
+
+
+@sa.event.listens_for(Shop, 'after_update')
+@sa.event.listens_for(Shop, 'after_delete')
+def _shop_changed(mapper, connection, target):
+    session = sa.inspect(target).session
+    if session is not None:
+        _pending(session).add(target.id)
+
+
+@sa.event.listens_for(Session, 'after_commit')
+def _evict_pending(session):
+    product_ids = session.info.pop('page_cache_evict', None)
+    if product_ids:
+        evict_product_pages(product_ids)
+
+
+@sa.event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('page_cache_evict', None)
@@ -0,0 +1,142 @@
+# Курсорная (keyset) пагинация списков.
+# Курсор — непрозрачный подписанный токен с последним значением ключа сортировки и id записи.
+# Следующая страница выбирается условием «после этой пары», поэтому не нужны ни OFFSET, ни COUNT(*).
+# Здесь же — подсчёт общего количества записей: точный, оценочный или никакой (count=).
+
+import json
+from datetime import datetime
+from flask import current_app
+from itsdangerous import URLSafeSerializer, BadSignature
+from extensions import db
+from utils.catalog_cache import count_cache
+
+
+CURSOR_SALT = 'keyset-cursor'
+
+# Способы подсчёта общего количества записей (параметр count=)
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=CURSOR_SALT)
+
+
+def encode_cursor(sort_key, value, row_id):
+    """
+    Упаковывает позицию последней выданной записи в подписанный токен.
+
+    :param sort_key: имя сортировки (ключ sort_mapping), для которой выдан курсор
+    :param value: значение столбца сортировки у последней записи
+    :param row_id: id последней записи (разрешает равные значения сортировки)
+    """
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    return _serializer().dumps({'s': sort_key, 'v': value, 'id': row_id})
+
+
+def decode_cursor(token, sort_key):
+    """
+    Распаковывает курсор и проверяет, что он выдан для той же сортировки.
+
+    Возвращает (value, row_id). Бросает ValueError, если токен повреждён,
+    подделан или относится к другой сортировке.
+    """
+    try:
+        data = _serializer().loads(token)
+    except BadSignature:
+        raise ValueError("Некорректный курсор")
+
+    if not isinstance(data, dict) or data.get('s') != sort_key or not isinstance(data.get('id'), int):
+        raise ValueError("Курсор не соответствует параметрам сортировки")
+
+    value = data.get('v')
+    if isinstance(value, dict) and 'dt' in value:
+        value = datetime.fromisoformat(value['dt'])
+    return value, data['id']
+
+
+def keyset_order(column, id_column, descending):
+    """Порядок сортировки с id в качестве однозначного дополнительного ключа."""
+    if descending:
+        return column.desc(), id_column.desc()
+    return column.asc(), id_column.asc()
+
+
+def keyset_column(column):
+    """
+    Выражение столбца сортировки для курсора: по нему читается значение
+    в курсор и строится условие keyset_condition.
+
+    SQLite хранит даты текстом, причём в разных форматах: func.now() пишет
+    '… HH:MM:SS', Python-значения — '… HH:MM:SS.ffffff'. Чтобы значение
+    из курсора совпадало с хранимым, на SQLite столбец дат читается
+    и сравнивается как хранимая строка — в том же порядке, что и ORDER BY.
+    type_coerce не меняет SQL, поэтому индекс по столбцу используется.
+    """
+    if isinstance(column.type, db.DateTime) and db.engine.dialect.name == 'sqlite':
+        return db.type_coerce(column, db.String)
+    return column
+
+
+def keyset_condition(column, id_column, descending, value, row_id):
+    """
+    Условие «строго после (value, row_id)» в выбранном направлении сортировки.
+    Записано через OR/AND, а не через сравнение кортежей, чтобы одинаково
+    работать на SQLite и PostgreSQL и использовать индекс по столбцу сортировки.
+    """
+    if descending:
+        return db.or_(column < value, db.and_(column == value, id_column < row_id))
+    return db.or_(column > value, db.and_(column == value, id_column > row_id))
+
+
+def count_rows(stmt):
+    """Количество строк, которые вернёт select (без учёта сортировки)."""
+    return db.session.execute(
+        db.select(db.func.count()).select_from(stmt.order_by(None).subquery())
+    ).scalar_one()
+
+
+def parse_count_mode(value, default):
+    """
+    Разбирает параметр count: exact — точный COUNT, estimate — оценка,
+    none — без подсчёта. Булевы значения (count=1) поддерживаются для
+    совместимости: true — exact, false — none. Бросает ValueError.
+    """
+    if not value:
+        return default
+    value = value.lower()
+    if value in ('true', '1', 'on', 'yes'):
+        return 'exact'
+    if value in ('false', '0', 'off', 'no'):
+        return 'none'
+    if value not in COUNT_MODES:
+        raise ValueError(f"Параметр count должен быть одним из: {', '.join(COUNT_MODES)}")
+    return value
+
+
+def _planner_estimate(stmt):
+    """Оценка числа строк по статистике планировщика PostgreSQL (EXPLAIN без выполнения)."""
+    connection = db.session.connection()
+    compiled = stmt.order_by(None).compile(
+        dialect=connection.dialect, compile_kwargs={'render_postcompile': True}
+    )
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_rows(stmt, cache_key):
+    """
+    Приблизительное количество строк select.
+    PostgreSQL — статистика планировщика; остальные СУБД — точный COUNT,
+    закэшированный по cache_key (нормализованным фильтрам) на COUNT_ESTIMATE_TTL.
+    """
+    if db.session.connection().dialect.name == 'postgresql':
+        return _planner_estimate(stmt)
+
+    total = count_cache.get(cache_key)
+    if total is None:
+        total = count_rows(stmt)
+        count_cache.set(cache_key, total)
+    return total
@@ -0,0 +1,76 @@
+# Потоковая выгрузка списка товаров (NDJSON / CSV).
+# Строки читаются из БД порциями (yield_per, на PostgreSQL — серверный курсор)
+# и сразу отправляются клиенту, поэтому память воркера не зависит от размера каталога.
+# Запрос — Core select() из product_select(), строки сериализуются без ORM-объектов.
+
+import csv
+import io
+import json
+from flask import current_app, stream_with_context
+from extensions import db
+from utils.product_serializer import row_serializer
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _ndjson_chunks(rows, fields, batch_size):
+    serialize_row = row_serializer(fields)
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(serialize_row(row), ensure_ascii=False))
+        if len(buffer) >= batch_size:
+            yield '\n'.join(buffer) + '\n'
+            buffer.clear()
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+
+def _csv_chunks(rows, fields, batch_size):
+    serialize_row = row_serializer(fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    # Заголовок уходит клиенту сразу — первый байт не ждёт первой порции из БД
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    count = 0
+    for row in rows:
+        item = serialize_row(row)
+        # Вложенные значения (img_srcset) — JSON в ячейке
+        writer.writerow([json.dumps(item[f], ensure_ascii=False) if isinstance(item[f], dict) else item[f]
+                         for f in fields])
+        count += 1
+        if count >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if count:
+        yield buffer.getvalue()
+
+
+def stream_products(stmt, fields, fmt):
+    """
+    Возвращает потоковый ответ со всеми товарами запроса product_select()
+    в формате fmt ('ndjson' или 'csv'). Размер порции чтения задаётся EXPORT_BATCH_SIZE.
+    """
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 500)
+    chunks = _ndjson_chunks if fmt == 'ndjson' else _csv_chunks
+
+    def rows():
+        # Запрос выполняется при первой итерации — уже внутри потокового ответа
+        yield from db.session.execute(stmt.execution_options(yield_per=batch_size))
+
+    response = current_app.response_class(
+        stream_with_context(chunks(rows(), fields, batch_size)),
+        mimetype=EXPORT_FORMATS[fmt]
+    )
+    if fmt == 'csv':
+        response.headers['Content-Disposition'] = 'attachment; filename=products.csv'
+    return response
@@ -0,0 +1,97 @@
+# Фасеты каталога: количество товаров по категориям, по признаку акции
+# и гистограмма цен — всё одним агрегирующим запросом с GROUP BY.
+
+from flask import current_app
+from extensions import db
+from models import Shop
+from utils.product_filters import apply_product_filters
+
+
+def parse_price_buckets(args):
+    """
+    Разбирает настройки гистограммы цен:
+      - price_edges=0,10000,50000 — явные левые границы корзин (по возрастанию);
+      - bucket_size=N — корзины одинаковой ширины N (по умолчанию FACET_PRICE_BUCKET_SIZE).
+
+    Возвращает ('edges', [..]) или ('size', N). Бросает ValueError при ошибке.
+    """
+    raw_edges = args.get('price_edges')
+    if raw_edges:
+        try:
+            edges = [int(e) for e in raw_edges.split(',') if e.strip()]
+        except ValueError:
+            raise ValueError("price_edges должен быть списком целых чисел через запятую")
+        if not edges or edges != sorted(set(edges)):
+            raise ValueError("price_edges должны строго возрастать")
+        return 'edges', edges
+
+    size = args.get('bucket_size', type=int)
+    if size is None:
+        size = current_app.config.get('FACET_PRICE_BUCKET_SIZE', 10000)
+    if size < 1:
+        raise ValueError("bucket_size должен быть больше нуля")
+    return 'size', size
+
+
+def _bucket_expression(mode, value):
+    if mode == 'size':
+        # Цены бывают дробными (REAL в SQLite), и // там не округляет вниз.
+        # Цены неотрицательны, поэтому на SQLite CAST (отбрасывание дробной части)
+        # равен floor, которого нет в части сборок; в PostgreSQL CAST округляет
+        ratio = Shop.price / float(value)
+        if db.engine.dialect.name != 'sqlite':
+            ratio = db.func.floor(ratio)
+        return db.cast(ratio, db.Integer)
+    # Номер последней границы, не превышающей цену; -1 — цена ниже первой границы
+    whens = [(Shop.price >= edge, i) for i, edge in reversed(list(enumerate(value)))]
+    return db.case(*whens, else_=-1)
+
+
+def _bucket_bounds(mode, value, bucket):
+    if mode == 'size':
+        return bucket * value, (bucket + 1) * value
+    if bucket < 0:
+        return None, value[0]
+    upper = value[bucket + 1] if bucket + 1 < len(value) else None
+    return value[bucket], upper
+
+
+def compute_facets(args):
+    """
+    Считает фасеты для набора товаров, выбранного теми же фильтрами, что и
+    GET /api/products. Бросает ValueError, если параметры некорректны.
+    """
+    mode, value = parse_price_buckets(args)
+    bucket = _bucket_expression(mode, value).label('bucket')
+
+    query = db.session.query(
+        Shop.category, Shop.sale, bucket, db.func.count(Shop.id)
+    ).select_from(Shop)
+    query, _, _ = apply_product_filters(query, args)
+    rows = query.group_by(Shop.category, Shop.sale, bucket).all()
+
+    categories = {}
+    sale = {'true': 0, 'false': 0}
+    histogram = {}
+    total = 0
+    for category, is_sale, bucket_no, count in rows:
+        total += count
+        if category is not None:
+            categories[category] = categories.get(category, 0) + count
+        sale['true' if is_sale else 'false'] += count
+        histogram[bucket_no] = histogram.get(bucket_no, 0) + count
+
+    price_histogram = []
+    for bucket_no in sorted(histogram):
+        price_from, price_to = _bucket_bounds(mode, value, bucket_no)
+        price_histogram.append({'from': price_from, 'to': price_to, 'count': histogram[bucket_no]})
+
+    return {
+        'total': total,
+        'categories': [
+            {'category': name, 'count': count}
+            for name, count in sorted(categories.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'sale': sale,
+        'price_histogram': price_histogram,
+    }
@@ -0,0 +1,124 @@
+# Фильтры каталога товаров по параметрам запроса.
+# Общие для списка товаров, фасетов и выгрузок, чтобы все они видели один и тот же набор строк.
+
+from datetime import datetime, timedelta
+from extensions import db
+from models import Shop
+from utils.search import apply_search
+
+
+# Параметры запроса, которые понимает apply_product_filters
+PRODUCT_FILTER_PARAMS = frozenset({
+    'user_id', 'category', 'q', 'title', 'price_min', 'price_max',
+    'quantity', 'quantity_min', 'quantity_max', 'date', 'date_from', 'date_to', 'sale',
+})
+
+def apply_product_filters(query, args, connection=None):
+    """
+    Применяет к запросу товаров фильтры из параметров запроса:
+    user_id, category, q, title, price_min/price_max, quantity/quantity_min/quantity_max,
+    date/date_from/date_to, sale.
+
+    Возвращает (query, search_text, search_rank), где search_rank — выражение
+    сортировки по релевантности (или None). Бросает ValueError с текстом
+    ошибки для клиента, если параметры некорректны. connection передаётся
+    в apply_search (по умолчанию — соединение текущей сессии).
+    """
+    # === Фильтр по владельцу (user_id) ===
+    user_id_param = args.get('user_id', type=int)
+    if user_id_param is not None:
+        # Фильтруем только товары указанного пользователя
+        query = query.filter(Shop.user_id == user_id_param)
+
+    # === Фильтр по категории ===
+    categories = args.getlist('category')
+    if categories:
+        # Очистка: удаляем пустые и лишние пробелы
+        clean_categories = [c.strip() for c in categories if c.strip()]
+        if clean_categories:
+            query = query.filter(Shop.category.in_(clean_categories))
+
+    # === Полнотекстовый поиск ===
+    # q ищет по названию, описанию, категории и артикулу
+    search_rank = None
+    search_text = args.get('q')
+    if search_text:
+        query, search_rank = apply_search(query, search_text, connection)
+
+    # === Фильтр по названию (подстрока) ===
+    title = args.get('title')
+    if title:
+        query = query.filter(Shop.title.ilike(f"%{title}%"))
+
+    # === Фильтр по цене ===
+    price_min = args.get('price_min', type=float)
+    price_max = args.get('price_max', type=float)
+    if price_min is not None and price_max is not None:
+        if price_min > price_max:
+            raise ValueError("price_min не может быть больше price_max")
+        query = query.filter(Shop.price.between(price_min, price_max))
+    elif price_min is not None:
+        if price_min < 0:
+            raise ValueError("price_min не может быть отрицательным")
+        query = query.filter(Shop.price >= price_min)
+    elif price_max is not None:
+        if price_max < 0:
+            raise ValueError("price_max не может быть отрицательным")
+        query = query.filter(Shop.price <= price_max)
+
+    # === Фильтр по количеству ===
+    quantity = args.get('quantity', type=int)
+    quantity_min = args.get('quantity_min', type=int)
+    quantity_max = args.get('quantity_max', type=int)
+    
+    if quantity is not None:
+        if quantity < 0:
+            raise ValueError("Количество не может быть отрицательным")
+        query = query.filter(Shop.quantity == quantity)
+    else:
+        if quantity_min is not None:
+            if quantity_min < 0:
+                raise ValueError("quantity_min не может быть отрицательным")
+            query = query.filter(Shop.quantity >= quantity_min)
+        if quantity_max is not None:
+            if quantity_max < 0:
+                raise ValueError("quantity_max не может быть отрицательным")
+            query = query.filter(Shop.quantity <= quantity_max)
+
+    # === Фильтр по дате создания ===
+    date_exact = args.get('date')
+    date_from = args.get('date_from')
+    date_to = args.get('date_to')
+
+    if date_exact:
+        try:
+            dt = datetime.strptime(date_exact, "%d.%m.%Y")
+            query = query.filter(db.func.date(Shop.created_at) == dt.date())
+        except ValueError:
+            raise ValueError("Неверный формат даты. Используйте дд.мм.гггг")
+    else:
+        if date_from:
+            try:
+                dt_from = datetime.strptime(date_from, "%d.%m.%Y")
+                query = query.filter(Shop.created_at >= dt_from)
+            except ValueError:
+                raise ValueError("Неверный формат date_from. Используйте дд.мм.гггг")
+        if date_to:
+            try:
+                dt_to = datetime.strptime(date_to, "%d.%m.%Y") + timedelta(days=1)
+                query = query.filter(Shop.created_at < dt_to)
+            except ValueError:
+                raise ValueError("Неверный формат date_to. Используйте дд.мм.гггг")
+
+    # === Фильтр по акции ===
+    sale = args.get('sale')
+    if sale is not None:
+        sale_lower = sale.lower()
+        if sale_lower in ('true', '1', 'on', 'yes'):
+            query = query.filter(Shop.sale == True)
+        elif sale_lower in ('false', '0', 'off', 'no'):
+            query = query.filter(Shop.sale == False)
+        else:
+            raise ValueError("Параметр sale должен быть булевым (true/false, 1/0)")
+
+    return query, search_text, search_rank
@@ -0,0 +1,250 @@
+# Массовый импорт товаров из CSV или NDJSON.
+# Файл читается потоково, существующие артикулы загружаются одним запросом,
+# а запись в БД идёт порциями (executemany) с фиксацией после каждой порции.
+
+import codecs
+import csv
+import json
+import logging
+import sqlalchemy as sa
+from extensions import db
+from models import Shop, utc_now
+from utils.add_img import resolve_image_reference, DEFAULT_PRODUCT_IMAGE
+from utils.search import index_products
+from utils.suggest import suggest_index
+from utils.page_cache import evict_product_pages
+from utils.image_variants import schedule_image_variants
+
+
+product_logger = logging.getLogger('app.product')
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+shop_table = Shop.__table__
+
+# Поля, которые импорт перезаписывает у существующего товара
+UPDATE_COLUMNS = ('title', 'description', 'category', 'price', 'quantity', 'sale', 'updated_at')
+
+
+def iter_records(stream, fmt):
+    """
+    Построчно читает бинарный поток и возвращает пары (номер строки, запись).
+    Для некорректной строки NDJSON вместо записи возвращается ValueError.
+    """
+    text = codecs.getreader('utf-8-sig')(stream)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        # Номер строки данных: заголовок — строка 1
+        for row_no, record in enumerate(reader, start=2):
+            yield row_no, record
+        return
+
+    for row_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Строка должна содержать JSON-объект")
+        except ValueError as e:
+            yield row_no, ValueError(f"Некорректный JSON: {e}")
+            continue
+        yield row_no, record
+
+
+def _text(record, key):
+    value = record.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def validate_record(record):
+    """
+    Проверяет запись импорта по тем же правилам, что и add_product.
+    Возвращает словарь значений для таблицы shop или бросает ValueError.
+    """
+    values = {
+        'article_num': _text(record, 'article_num'),
+        'title': _text(record, 'title'),
+        'description': _text(record, 'description'),
+        'category': _text(record, 'category'),
+    }
+    price_str = _text(record, 'price')
+    quantity_str = _text(record, 'quantity')
+
+    required_fields = {
+        'article_num': values['article_num'],
+        'title': values['title'],
+        'description': values['description'],
+        'price': price_str,
+        'quantity': quantity_str,
+        'category': values['category'],
+    }
+    missing = [field for field, value in required_fields.items() if not value]
+    if missing:
+        raise ValueError(f"Не заполнены обязательные поля: {', '.join(missing)}")
+
+    try:
+        values['price'] = float(price_str)
+    except ValueError:
+        raise ValueError("Цена должна быть числом")
+    if values['price'] < 0:
+        raise ValueError("Цена не может быть отрицательной")
+
+    try:
+        values['quantity'] = int(quantity_str)
+    except ValueError:
+        raise ValueError("Количество должно быть целым числом")
+    if values['quantity'] < 0:
+        raise ValueError("Количество не может быть отрицательным")
+
+    sale = record.get('sale')
+    if isinstance(sale, bool):
+        values['sale'] = sale
+    else:
+        values['sale'] = _text(record, 'sale').lower() in ('true', '1', 'on', 'yes')
+
+    img_url = _text(record, 'img_url')
+    if img_url:
+        values['link_img'] = resolve_image_reference(img_url)
+
+    return values
+
+
+class ProductImporter:
+    """
+    Накопитель импорта: проверяет записи, копит вставки и обновления
+    и записывает их порциями по chunk_size строк.
+
+    :param user: пользователь, выполняющий импорт (владелец новых товаров)
+    :param chunk_size: количество строк в одной порции записи
+    """
+
+    def __init__(self, user, chunk_size):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.report = []
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+
+        # Все артикулы каталога одним запросом: {артикул: (id, владелец)}
+        self.existing = {
+            article: (product_id, owner_id)
+            for article, product_id, owner_id
+            in db.session.query(Shop.article_num, Shop.id, Shop.user_id)
+        }
+        self.seen = set()
+        self._inserts = []
+        self._updates = []
+
+    def _error(self, row_no, article_num, message):
+        self.failed += 1
+        self.report.append({'row': row_no, 'article_num': article_num, 'status': 'error', 'error': message})
+
+    def add(self, row_no, record):
+        """Проверяет запись и ставит её в очередь на вставку или обновление."""
+        if isinstance(record, Exception):
+            self._error(row_no, None, str(record))
+            return
+
+        article_num = _text(record, 'article_num') or None
+        try:
+            values = validate_record(record)
+        except ValueError as e:
+            self._error(row_no, article_num, str(e))
+            return
+
+        if article_num in self.seen:
+            self._error(row_no, article_num, "Артикул повторяется в файле импорта")
+            return
+        self.seen.add(article_num)
+
+        if article_num in self.existing:
+            product_id, owner_id = self.existing[article_num]
+            if self.user.role != 'admin' and owner_id != self.user.id:
+                self._error(row_no, article_num, "Товар с таким артикулом принадлежит другому продавцу")
+                return
+            values['id'] = product_id
+            self._updates.append((row_no, values))
+        else:
+            values['user_id'] = self.user.id
+            values.setdefault('link_img', DEFAULT_PRODUCT_IMAGE)
+            self._inserts.append((row_no, values))
+
+        if len(self._inserts) + len(self._updates) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленную порцию: INSERT и UPDATE через executemany, затем COMMIT."""
+        inserts, self._inserts = self._inserts, []
+        updates, self._updates = self._updates, []
+        if not inserts and not updates:
+            return
+
+        try:
+            connection = db.session.connection()
+            changed_ids = []
+
+            if inserts:
+                result = connection.execute(
+                    sa.insert(shop_table).returning(shop_table.c.id, sort_by_parameter_order=True),
+                    [values for _, values in inserts]
+                )
+                new_ids = result.scalars().all()
+                changed_ids.extend(new_ids)
+
+            if updates:
+                update_values = {c: sa.bindparam(f'b_{c}') for c in UPDATE_COLUMNS}
+                # Без ссылки на изображение сохраняем текущее фото товара (и его копии)
+                new_link_img = sa.bindparam('b_link_img', type_=sa.String)
+                update_values['link_img'] = sa.func.coalesce(new_link_img, shop_table.c.link_img)
+                update_values['image_variants'] = sa.case(
+                    (new_link_img.is_(None), shop_table.c.image_variants), else_=None
+                )
+                connection.execute(
+                    sa.update(shop_table).where(shop_table.c.id == sa.bindparam('b_id')).values(update_values),
+                    [self._update_params(values) for _, values in updates]
+                )
+                changed_ids.extend(values['id'] for _, values in updates)
+
+            # Core-запросы не вызывают события ORM — обновляем поисковый индекс явно
+            index_products(connection, changed_ids)
+            db.session.commit()
+
+        except Exception:
+            db.session.rollback()
+            product_logger.exception("Ошибка записи порции импорта товаров")
+            for row_no, values in inserts + updates:
+                self._error(row_no, values['article_num'], "Ошибка записи в базу данных")
+            return
+
+        # Core-запросы не вызывают события ORM — обновляем индекс подсказок явно
+        for (_, values), product_id in zip(inserts, new_ids if inserts else []):
+            suggest_index.upsert(product_id, values['title'], values['article_num'])
+        for _, values in updates:
+            suggest_index.upsert(values['id'], values['title'], values['article_num'])
+        evict_product_pages([values['id'] for _, values in updates])
+
+        # Копии изображений — для товаров, которым изображение указано в файле
+        for (_, values), product_id in zip(inserts, new_ids if inserts else []):
+            if values['link_img'] != DEFAULT_PRODUCT_IMAGE:
+                schedule_image_variants(product_id, values['link_img'])
+        for _, values in updates:
+            if values.get('link_img'):
+                schedule_image_variants(values['id'], values['link_img'])
+
+        for (row_no, values), product_id in zip(inserts, new_ids if inserts else []):
+            self.created += 1
+            self.existing[values['article_num']] = (product_id, self.user.id)
+            self.report.append({'row': row_no, 'article_num': values['article_num'],
+                                'status': 'created', 'id': product_id})
+        for row_no, values in updates:
+            self.updated += 1
+            self.report.append({'row': row_no, 'article_num': values['article_num'],
+                                'status': 'updated', 'id': values['id']})
+
+    def _update_params(self, values):
+        params = {f'b_{key}': values.get(key) for key in UPDATE_COLUMNS + ('id', 'link_img')}
+        params['b_updated_at'] = utc_now()
+        return params
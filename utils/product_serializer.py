@@ -0,0 +1,111 @@
+# Сериализация товаров для API с поддержкой выборочных полей (fields=)
+# и укороченного описания (description_preview=N).
+# Чтение идёт Core-запросом только по нужным столбцам: строки-кортежи
+# сразу превращаются в словари ответа, минуя создание ORM-объектов.
+
+import sqlalchemy as sa
+from extensions import db
+from models import Shop
+from utils.image_variants import build_srcset
+
+
+# Ключ в ответе API -> атрибут модели Shop (порядок ключей сохраняется в ответе)
+PRODUCT_FIELDS = {
+    'id': 'id',
+    'article_num': 'article_num',
+    'user_id': 'user_id',
+    'title': 'title',
+    'description': 'description',
+    'price': 'price',
+    'quantity': 'quantity',
+    'img_url': 'link_img',
+    'img_srcset': 'image_variants',
+    'created_at': 'created_at',
+    'sale': 'sale',
+    'category': 'category',
+}
+
+
+def parse_fields(args):
+    """
+    Разбирает параметры fields и description_preview.
+
+    Возвращает (fields, preview): список ключей ответа и длину превью описания
+    (None — описание целиком). Бросает ValueError при некорректных значениях.
+    """
+    fields = list(PRODUCT_FIELDS)
+    raw_fields = args.get('fields')
+    if raw_fields:
+        requested = [f.strip() for f in raw_fields.split(',') if f.strip()]
+        unknown = [f for f in requested if f not in PRODUCT_FIELDS]
+        if unknown:
+            raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+        # id нужен всегда: по нему строятся ссылки и курсоры
+        fields = [f for f in PRODUCT_FIELDS if f in requested or f == 'id']
+
+    preview = None
+    raw_preview = args.get('description_preview')
+    if raw_preview is not None:
+        try:
+            preview = int(raw_preview)
+        except ValueError:
+            raise ValueError("description_preview должен быть целым числом")
+        if preview < 1:
+            raise ValueError("description_preview должен быть больше нуля")
+
+    return fields, preview
+
+
+def product_select(fields, preview=None):
+    """
+    Core-запрос select() только по столбцам выбранных полей — без ORM-объектов
+    и identity map. Столбцы называются ключами ответа и идут в порядке fields;
+    превью описания обрезается в SQL. Служебные столбцы (сортировка, ревизия)
+    добавляются вызывающим кодом через add_columns() после столбцов ответа.
+    """
+    columns = []
+    for key in fields:
+        column = getattr(Shop, PRODUCT_FIELDS[key])
+        if key == 'description' and preview is not None:
+            column = db.func.substr(Shop.description, 1, preview)
+        columns.append(column.label(key))
+    return sa.select(*columns).select_from(Shop)
+
+
+def row_serializer(fields):
+    """
+    Возвращает функцию, преобразующую строку product_select() в словарь ответа.
+    Служебные столбцы после полей ответа отбрасываются.
+    """
+    keys = tuple(fields)
+    has_created_at = 'created_at' in keys
+    has_srcset = 'img_srcset' in keys
+
+    def serialize_row(row):
+        item = dict(zip(keys, row))
+        if has_created_at:
+            item['created_at'] = item['created_at'].isoformat()
+        if has_srcset:
+            item['img_srcset'] = build_srcset(item['img_srcset'])
+        return item
+
+    return serialize_row
+
+
+def serialize_rows(rows, fields):
+    """Преобразует строки product_select() в список словарей ответа."""
+    serialize_row = row_serializer(fields)
+    return [serialize_row(row) for row in rows]
+
+
+def serialize_product(product, fields=None):
+    """Преобразует ORM-объект товара в словарь ответа (после изменения товара)."""
+    result = {}
+    for key in fields or PRODUCT_FIELDS:
+        value = getattr(product, PRODUCT_FIELDS[key])
+        if key == 'created_at':
+            value = value.isoformat()
+        elif key == 'img_srcset':
+            value = build_srcset(value)
+        result[key] = value
+    return result
@@ -0,0 +1,201 @@
+# Полнотекстовый поиск по товарам.
+# SQLite: виртуальная таблица FTS5 shop_fts (rowid = shop.id).
+# PostgreSQL: столбец shop.search_vector (tsvector) с GIN-индексом.
+# Индекс обновляется из событий SQLAlchemy на модели Shop, поэтому
+# отдельная синхронизация при добавлении/изменении/удалении товара не нужна.
+# Массовые операции через Core (импорт, групповые изменения) событий ORM не вызывают
+# и обновляют индекс явно через index_products / unindex_products.
+
+import logging
+import re
+import sqlalchemy as sa
+from extensions import db
+from models import Shop
+
+
+sys_logger = logging.getLogger('app.system')
+
+# Индексируемые поля товара
+SEARCH_FIELDS = ('title', 'description', 'category', 'article_num')
+
+# Конфигурация текстового поиска PostgreSQL
+TS_CONFIG = 'russian'
+
+shop_fts = sa.table('shop_fts', sa.column('rowid'), *(sa.column(f) for f in SEARCH_FIELDS))
+
+# Размер пачки id в одном запросе (SQLite до 3.32 допускает не более 999 параметров)
+ID_CHUNK_SIZE = 500
+
+# Кэш проверки наличия поискового индекса: {url движка: bool}
+_index_available = {}
+
+
+def _tokens(text):
+    """Разбивает запрос на слова в том виде, в каком их ввёл пользователь."""
+    return re.findall(r'\w+', text)
+
+
+def _ts_document():
+    """Выражение tsvector по индексируемым полям (для PostgreSQL)."""
+    parts = " || ' ' || ".join(f"coalesce({f}, '')" for f in SEARCH_FIELDS)
+    return f"to_tsvector('{TS_CONFIG}', {parts})"
+
+
+def search_index_available(connection):
+    """Проверяет (однократно для каждой базы), создан ли поисковый индекс миграцией."""
+    key = str(connection.engine.url)
+    if key not in _index_available:
+        dialect = connection.dialect.name
+        inspector = sa.inspect(connection)
+        if dialect == 'sqlite':
+            _index_available[key] = inspector.has_table('shop_fts')
+        elif dialect == 'postgresql':
+            columns = {c['name'] for c in inspector.get_columns('shop')}
+            _index_available[key] = 'search_vector' in columns
+        else:
+            _index_available[key] = False
+    return _index_available[key]
+
+
+def create_search_index(connection):
+    """
+    Создаёт структуры полнотекстового поиска для текущей СУБД и заполняет их.
+    Вызывается командой flask reindex-search; повторный вызов безопасен.
+    Миграция c4d82a7e5f19 создаёт те же структуры своим SQL — миграции
+    не импортируют код приложения.
+    """
+    dialect = connection.dialect.name
+    fields = ', '.join(SEARCH_FIELDS)
+
+    if dialect == 'sqlite':
+        connection.execute(sa.text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS shop_fts USING fts5("
+            f"{fields}, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    elif dialect == 'postgresql':
+        connection.execute(sa.text("ALTER TABLE shop ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        connection.execute(sa.text(
+            "CREATE INDEX IF NOT EXISTS ix_shop_search_vector ON shop USING gin (search_vector)"
+        ))
+    else:
+        return
+
+    _index_available.pop(str(connection.engine.url), None)
+    rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection):
+    """Полностью перестраивает поисковый индекс по таблице shop."""
+    dialect = connection.dialect.name
+    fields = ', '.join(SEARCH_FIELDS)
+
+    if dialect == 'sqlite':
+        connection.execute(sa.text("DELETE FROM shop_fts"))
+        connection.execute(sa.text(
+            f"INSERT INTO shop_fts (rowid, {fields}) SELECT id, {fields} FROM shop"
+        ))
+    elif dialect == 'postgresql':
+        connection.execute(sa.text(f"UPDATE shop SET search_vector = {_ts_document()}"))
+
+
+def index_products(connection, product_ids):
+    """
+    Обновляет поисковый индекс для указанных товаров.
+    Нужен для массовых операций (Core INSERT/UPDATE), которые не вызывают события ORM.
+    """
+    if not product_ids or not search_index_available(connection):
+        return
+
+    dialect = connection.dialect.name
+    fields = ', '.join(SEARCH_FIELDS)
+    ids = sa.bindparam('ids', expanding=True)
+
+    if dialect == 'sqlite':
+        connection.execute(sa.text("DELETE FROM shop_fts WHERE rowid IN :ids").bindparams(ids),
+                           {'ids': list(product_ids)})
+        connection.execute(sa.text(
+            f"INSERT INTO shop_fts (rowid, {fields}) SELECT id, {fields} FROM shop WHERE id IN :ids"
+        ).bindparams(ids), {'ids': list(product_ids)})
+    elif dialect == 'postgresql':
+        connection.execute(sa.text(
+            f"UPDATE shop SET search_vector = {_ts_document()} WHERE id IN :ids"
+        ).bindparams(ids), {'ids': list(product_ids)})
+
+
+def unindex_products(connection, product_ids):
+    """Удаляет товары из поискового индекса (на PostgreSQL индекс удаляется вместе со строкой)."""
+    if not product_ids or connection.dialect.name != 'sqlite' or not search_index_available(connection):
+        return
+    product_ids = list(product_ids)
+    statement = sa.text("DELETE FROM shop_fts WHERE rowid IN :ids").bindparams(sa.bindparam('ids', expanding=True))
+    # Частями: число параметров запроса в SQLite ограничено
+    for start in range(0, len(product_ids), ID_CHUNK_SIZE):
+        connection.execute(statement, {'ids': product_ids[start:start + ID_CHUNK_SIZE]})
+
+
+# === Синхронизация индекса с таблицей shop ===
+
+@sa.event.listens_for(Shop, 'after_insert')
+def _shop_after_insert(mapper, connection, target):
+    index_products(connection, [target.id])
+
+
+@sa.event.listens_for(Shop, 'after_update')
+def _shop_after_update(mapper, connection, target):
+    state = sa.inspect(target)
+    if any(state.attrs[f].history.has_changes() for f in SEARCH_FIELDS):
+        index_products(connection, [target.id])
+
+
+@sa.event.listens_for(Shop, 'after_delete')
+def _shop_after_delete(mapper, connection, target):
+    unindex_products(connection, [target.id])
+
+
+# === Поиск ===
+
+def apply_search(query, text, connection=None):
+    """
+    Добавляет к запросу товаров условие полнотекстового поиска.
+
+    Возвращает (query, rank), где rank — выражение для сортировки по
+    релевантности (лучшие совпадения первыми) или None, если ранжирование
+    недоступно. Если поисковый индекс не создан, используется ILIKE по полям.
+    connection — соединение с базой, для которой строится запрос
+    (по умолчанию — соединение текущей сессии).
+    """
+    tokens = _tokens(text)
+    if not tokens:
+        return query, None
+
+    if connection is None:
+        connection = db.session.connection()
+    if not search_index_available(connection):
+        # Запасной вариант без индекса: каждое слово должно встречаться в одном из полей.
+        # Слова не приводятся к нижнему регистру: ILIKE в SQLite не сворачивает
+        # регистр кириллицы, и «Шины» после casefold не нашлись бы
+        for token in tokens:
+            pattern = f"%{token}%"
+            query = query.filter(db.or_(*(getattr(Shop, f).ilike(pattern) for f in SEARCH_FIELDS)))
+        return query, None
+
+    # Индекс хранит слова без учёта регистра (unicode61, to_tsvector)
+    tokens = [t.casefold() for t in tokens]
+
+    if connection.dialect.name == 'sqlite':
+        # Каждое слово — префиксный поиск, слова объединяются по AND
+        match = ' '.join(f'"{t}"*' for t in tokens)
+        fts = sa.literal_column('shop_fts')
+        ranked = (
+            sa.select(shop_fts.c.rowid.label('id'), sa.func.bm25(fts).label('rank'))
+            .where(fts.op('MATCH')(match))
+            .subquery('search')
+        )
+        query = query.join(ranked, ranked.c.id == Shop.id)
+        # bm25 возвращает меньшие значения для более релевантных строк
+        return query, ranked.c.rank.asc()
+
+    tsquery = sa.func.to_tsquery(TS_CONFIG, ' & '.join(f'{t}:*' for t in tokens))
+    vector = sa.literal_column('shop.search_vector')
+    query = query.filter(vector.op('@@')(tsquery))
+    return query, sa.func.ts_rank_cd(vector, tsquery).desc()
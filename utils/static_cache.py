@@ -0,0 +1,30 @@
+# Заголовки кэширования для статических файлов.
+# Файлы с хэшем содержимого в имени никогда не меняются: браузер и прокси
+# могут хранить их год без перепроверки (Cache-Control: immutable).
+
+import re
+from flask import request
+
+
+# Изображения товаров с хэш-именем и их уменьшенные копии,
+# CSS/JS с хэшем содержимого в имени (flask build-assets)
+IMMUTABLE_STATIC_RE = re.compile(
+    r'^(img/products/[0-9a-f]{40}(-\d+w)?\.\w+'
+    r'|(css|js)/.+\.[0-9a-f]{12}\.(css|js))$'
+)
+
+
+def init_static_cache(app):
+    """Регистрирует выдачу долгоживущих заголовков кэширования для неизменяемых файлов."""
+    max_age = app.config.get('IMMUTABLE_MAX_AGE', 365 * 24 * 3600)
+
+    @app.after_request
+    def immutable_static_headers(response):
+        if request.endpoint != 'static' or response.status_code not in (200, 304):
+            return response
+        if IMMUTABLE_STATIC_RE.match(request.view_args.get('filename', '')):
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
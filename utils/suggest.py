@@ -0,0 +1,205 @@
+# Подсказки при вводе (автодополнение) по названию и артикулу товара.
+# Индекс — отсортированный массив нормализованных ключей в памяти процесса;
+# поиск по префиксу — двоичный (bisect), без обращений к БД.
+#
+# Индекс строится при первом запросе и обновляется точечно: изменения товаров
+# через ORM собираются событиями и применяются после COMMIT, массовые операции
+# (импорт, групповое удаление) обновляют индекс явно. Записи других воркеров
+# попадают в индекс при фоновой перестройке раз в SUGGEST_INDEX_TTL секунд.
+
+import bisect
+import logging
+import re
+import threading
+import time
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+from flask import current_app
+from extensions import db
+from models import Shop
+from utils.background import run_in_background
+
+
+sys_logger = logging.getLogger('app.system')
+
+# Приоритет совпадения: начало названия или артикула, затем начало слова в названии
+RANK_PREFIX = 0
+RANK_WORD = 1
+
+# Сколько ключей просматривается на один результат подсказки
+SCAN_FACTOR = 20
+
+
+def normalize(text):
+    """Приводит текст к виду ключа: casefold Unicode и одиночные пробелы."""
+    return ' '.join((text or '').casefold().split())
+
+
+def _index_keys(title, article_num):
+    """Ключи товара: название целиком, название с каждого слова, артикул."""
+    keys = {}
+    title = normalize(title)
+    if title:
+        keys[title] = RANK_PREFIX
+        for match in re.finditer(r'\s(\S)', title):
+            keys.setdefault(title[match.start(1):], RANK_WORD)
+    article_num = normalize(article_num)
+    if article_num:
+        keys[article_num] = RANK_PREFIX
+    return keys.items()
+
+
+class PrefixIndex:
+    """Отсортированный префиксный индекс названий и артикулов товаров."""
+
+    def __init__(self):
+        self._entries = []   # отсортированные кортежи (ключ, приоритет, id товара)
+        self._products = {}  # id товара -> (название, артикул)
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self.built_at = None
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def build(self, rows):
+        """Полностью строит индекс по строкам (id, title, article_num)."""
+        products = {}
+        entries = []
+        for product_id, title, article_num in rows:
+            products[product_id] = (title, article_num)
+            entries.extend((key, rank, product_id) for key, rank in _index_keys(title, article_num))
+        entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._products = products
+            self.built_at = time.monotonic()
+
+    def _remove_locked(self, product_id):
+        product = self._products.pop(product_id, None)
+        if product is None:
+            return
+        for key, rank in _index_keys(*product):
+            entry = (key, rank, product_id)
+            i = bisect.bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+
+    def upsert(self, product_id, title, article_num):
+        """Добавляет или обновляет товар в индексе (до построения индекса — ничего не делает)."""
+        with self._lock:
+            if not self.is_built:
+                return
+            self._remove_locked(product_id)
+            self._products[product_id] = (title, article_num)
+            for key, rank in _index_keys(title, article_num):
+                bisect.insort(self._entries, (key, rank, product_id))
+
+    def remove(self, product_ids):
+        """Удаляет товары из индекса."""
+        with self._lock:
+            for product_id in product_ids:
+                self._remove_locked(product_id)
+
+    def search(self, prefix, limit):
+        """
+        Возвращает до limit товаров, у которых название, слово названия
+        или артикул начинается с prefix. Совпадения с начала названия
+        и артикула идут первыми, дальше — по алфавиту.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        best = {}
+        with self._lock:
+            i = bisect.bisect_left(self._entries, (prefix,))
+            end = min(len(self._entries), i + limit * SCAN_FACTOR)
+            while i < end:
+                key, rank, product_id = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                if rank < best.get(product_id, RANK_WORD + 1):
+                    best[product_id] = rank
+                i += 1
+            products = {product_id: self._products[product_id] for product_id in best}
+
+        ordered = sorted(best, key=lambda pid: (best[pid], normalize(products[pid][0]), pid))
+        return [
+            {'id': pid, 'title': products[pid][0], 'article_num': products[pid][1]}
+            for pid in ordered[:limit]
+        ]
+
+    def rebuild_from_db(self):
+        """Перестраивает индекс одним запросом к таблице shop."""
+        rows = db.session.execute(sa.select(Shop.id, Shop.title, Shop.article_num)).all()
+        self.build(rows)
+
+    def _background_rebuild(self, app):
+        try:
+            with app.app_context():
+                self.rebuild_from_db()
+        finally:
+            self._rebuilding = False
+
+    def ensure_fresh(self):
+        """
+        Строит индекс при первом обращении. Если индекс старше SUGGEST_INDEX_TTL,
+        запускает фоновую перестройку, а запросы пока обслуживает текущий индекс.
+        """
+        if not self.is_built:
+            self.rebuild_from_db()
+            return
+
+        ttl = current_app.config.get('SUGGEST_INDEX_TTL', 300)
+        if time.monotonic() - self.built_at < ttl:
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        run_in_background(self._background_rebuild, current_app._get_current_object())
+
+
+suggest_index = PrefixIndex()
+
+
+# === Синхронизация индекса с изменениями товаров через ORM ===
+# Изменения копятся в session.info до COMMIT: при откате индекс не меняется.
+
+def _pending(session):
+    return session.info.setdefault('suggest_changes', {})
+
+
+@sa.event.listens_for(Shop, 'after_insert')
+@sa.event.listens_for(Shop, 'after_update')
+def _shop_saved(mapper, connection, target):
+    session = sa.inspect(target).session
+    if session is not None:
+        _pending(session)[target.id] = (target.title, target.article_num)
+
+
+@sa.event.listens_for(Shop, 'after_delete')
+def _shop_deleted(mapper, connection, target):
+    session = sa.inspect(target).session
+    if session is not None:
+        _pending(session)[target.id] = None
+
+
+@sa.event.listens_for(Session, 'after_commit')
+def _apply_pending(session):
+    changes = session.info.pop('suggest_changes', None)
+    if not changes:
+        return
+    for product_id, product in changes.items():
+        if product is None:
+            suggest_index.remove([product_id])
+        else:
+            suggest_index.upsert(product_id, *product)
+
+
+@sa.event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('suggest_changes', None)
@@ -0,0 +1,125 @@
+# Кэш проверки отзыва JWT-токенов (token_in_blocklist_loader).
+#
+# - revoked: множество отозванных JTI (JTI -> время истечения токена). Пополняется
+#   сразу при выходе и отзыве сессий администратором; запись удаляется, когда
+#   токен истёк бы сам.
+# - seen: LRU недавно проверенных действующих JTI; запись живёт REVOCATION_CACHE_TTL
+#   секунд, но не дольше самого токена.
+# - user_versions: текущие версии прав пользователей (User.auth_version). Токен,
+#   в котором версия не совпадает с текущей (роль сменилась, пользователь удалён),
+#   отклоняется. Проверяется до кэша seen.
+#
+# Для действующего токена из кэша проверка обходится без запроса к БД.
+# Кэш живёт в памяти процесса: отзыв, выполненный в другом воркере, станет виден
+# здесь после истечения записи seen (REVOCATION_CACHE_TTL), а смена версии
+# прав — после истечения записи user_versions (AUTH_VERSION_CACHE_TTL).
+
+import threading
+import time
+from datetime import datetime, timezone
+from models import UserToken, User
+from utils.cache import LRUCache
+
+
+seen_tokens = LRUCache(maxsize=10000, ttl=60)
+user_versions = LRUCache(maxsize=10000, ttl=60)
+
+# Версия прав удалённого пользователя: не совпадает ни с одной версией в токенах
+USER_DELETED = -1
+
+_revoked = {}
+_revoked_lock = threading.Lock()
+
+
+def init_token_revocation(app):
+    """Применяет настройки кэша из конфигурации приложения."""
+    seen_tokens.maxsize = app.config.get('REVOCATION_CACHE_SIZE', 10000)
+    seen_tokens.ttl = app.config.get('REVOCATION_CACHE_TTL', 60)
+    user_versions.maxsize = app.config.get('REVOCATION_CACHE_SIZE', 10000)
+    user_versions.ttl = app.config.get('AUTH_VERSION_CACHE_TTL', 60)
+
+
+def _timestamp(expires):
+    if isinstance(expires, datetime):
+        # SQLite возвращает даты без часового пояса; в БД они хранятся в UTC
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        return expires.timestamp()
+    return float(expires)
+
+
+def mark_revoked(tokens):
+    """
+    Отмечает токены отозванными. tokens — пары (jti, срок действия):
+    срок — datetime или время Unix. Вызывается после COMMIT отзыва.
+    """
+    now = time.time()
+    with _revoked_lock:
+        # Истёкшие токены отклоняются и без кэша — убираем их из множества
+        for jti in [jti for jti, expires in _revoked.items() if expires <= now]:
+            del _revoked[jti]
+        for jti, expires in tokens:
+            expires = _timestamp(expires)
+            if expires > now:
+                _revoked[jti] = expires
+    for jti, _ in tokens:
+        seen_tokens.pop(jti)
+
+
+def active_user_tokens(user_ids):
+    """Действующие (не отозванные и не истёкшие) токены пользователей: [(jti, expires_at)]."""
+    now = datetime.now(timezone.utc)
+    return UserToken.query.with_entities(UserToken.jti, UserToken.expires_at).filter(
+        UserToken.user_id.in_(user_ids),
+        UserToken.revoked.is_(False),
+        UserToken.expires_at > now
+    ).all()
+
+
+def set_auth_versions(versions):
+    """
+    Запоминает новые версии прав {user_id: auth_version} (USER_DELETED — пользователь
+    удалён). Вызывается после COMMIT: токены со старой версией сразу отклоняются.
+    """
+    for user_id, version in versions.items():
+        user_versions.set(int(user_id), version)
+
+
+def _current_auth_version(user_id):
+    version = user_versions.get(user_id)
+    if version is None:
+        version = User.query.with_entities(User.auth_version).filter_by(id=user_id).scalar()
+        version = USER_DELETED if version is None else version
+        user_versions.set(user_id, version)
+    return version
+
+
+def is_token_revoked(jwt_payload):
+    """
+    Проверяет, отозван ли токен. Сначала версия прав пользователя, множество
+    отозванных и кэш проверенных токенов, при промахе — запрос к user_tokens.
+    """
+    jti = jwt_payload['jti']
+    # Токены, выданные до появления версии прав, проверяются только по JTI
+    auth_version = jwt_payload.get('auth_version')
+    if auth_version is not None and auth_version != _current_auth_version(int(jwt_payload['sub'])):
+        return True
+    with _revoked_lock:
+        if jti in _revoked:
+            return True
+    if seen_tokens.get(jti):
+        return False
+
+    token = UserToken.query.with_entities(UserToken.revoked, UserToken.expires_at).filter_by(jti=jti).first()
+    if token is not None and token.revoked:
+        mark_revoked([(jti, token.expires_at)])
+        return True
+
+    # Запись живёт не дольше токена и не дольше REVOCATION_CACHE_TTL: отзыв
+    # в другом воркере виден здесь с задержкой не больше этого срока
+    ttl = jwt_payload.get('exp', 0) - time.time()
+    if seen_tokens.ttl is not None:
+        ttl = min(ttl, seen_tokens.ttl)
+    if ttl > 0:
+        seen_tokens.set(jti, True, ttl=ttl)
+    return False
@@ -1,24 +1,33 @@
 import logging
-from flask import current_app
-from flask_jwt_extended import create_access_token, get_jti, verify_jwt_in_request, get_jwt_identity
+from typing import NamedTuple
+from flask import current_app, g
+from flask_jwt_extended import create_access_token, get_jti, verify_jwt_in_request, get_jwt_identity, get_jwt
 from flask_jwt_extended.exceptions import RevokedTokenError
 from datetime import datetime, timezone, timedelta
+from sqlalchemy.orm import load_only
 from models import UserToken, User
 from extensions import db
 
 
 sys_logger = logging.getLogger('app.system')
 
-def create_access_token_for_user(user_id):
+def create_access_token_for_user(user):
     """
     Создаёт JWT access-токен для пользователя и сохраняет его в базу данных
     как активную сессию (revoked=False).
+    В токен записываются роль и версия прав (auth_version): проверка прав
+    обходится без запроса к БД, а смена роли делает токен недействительным.
     
-    :param user_id: ID пользователя
+    :param user: пользователь (User)
     :return: str — JWT access token
     """
+    user_id = user.id
+
     # Генерация токена
-    access_token = create_access_token(identity=str(user_id))
+    access_token = create_access_token(
+        identity=str(user_id),
+        additional_claims={'role': user.role, 'auth_version': user.auth_version or 0}
+    )
 
     # Извлечение JTI
     jti = get_jti(encoded_token=access_token)
@@ -67,12 +76,53 @@ def create_access_token_for_user(user_id):
 #     ).first() is not None
 
 
+def get_current_user():
+    """
+    Возвращает пользователя текущего запроса (по JWT) или None.
+
+    Пользователь загружается один раз за запрос и хранится в flask.g.
+    Загружаются только id, имя и роль — остальные поля подгружаются при обращении.
+    Вызывается после проверки JWT (@jwt_required или get_safe_user_id).
+    """
+    user_id = get_jwt_identity()
+    # Вместе с пользователем храним identity: контекст приложения (а с ним и g)
+    # может быть общим для нескольких запросов, например в тестовом клиенте
+    cached = g.get('current_user')
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+
+    user = None
+    if user_id is not None:
+        user = db.session.get(User, int(user_id), options=[load_only(User.id, User.username, User.role)])
+    g.current_user = (user_id, user)
+    return user
+
+
+class TokenUser(NamedTuple):
+    """Пользователь по данным токена: достаточно для проверки прав и владения."""
+    id: int
+    role: str
+
+
+def get_token_user():
+    """
+    Возвращает id и роль пользователя из claims токена без запроса к БД.
+    Актуальность роли гарантирует проверка auth_version при проверке отзыва.
+    Для токенов без claims (выданных раньше) пользователь загружается из БД.
+    Вызывается после проверки JWT (@jwt_required).
+    """
+    claims = get_jwt()
+    if 'role' in claims:
+        return TokenUser(int(get_jwt_identity()), claims['role'])
+    return get_current_user()
+
+
 def get_safe_user_id():
     try:
         verify_jwt_in_request(optional=True)
         user_id = get_jwt_identity()
         if user_id is not None:
-            if User.query.get(user_id):
+            if get_current_user():
                 return str(user_id)
             else:
                 sys_logger.warning(f"JWT содержит user_id={user_id}, но пользователь не найден в БД")